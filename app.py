@@ -12,6 +12,18 @@ from models import User, Post, SystemSetting
 from utils.google_drive_utils import drive_manager
 from utils.tasks import set_db_path, trigger_db_sync
 from utils.time_utils import KST
+from utils.schema import upgrade_schema, migrate_post_json_columns
+from utils.fragment_cache import post_card_html
+from utils.thumbnail_store import thumbnail_srcset
+from utils.search_index import search_index
+from utils.preview_worker import preview_worker
+from utils.push_outbox import push_dispatcher
+from utils.image_pipeline import image_worker
+from utils.thumbnail_links import thumbnail_prefetcher
+from utils.thumbnail_store import thumbnail_evictor
+from utils.drive_gc import drive_gc_worker, reconcile_drive_files, DRIVE_GC_RECONCILE_HOURS
+from utils.db_backup import DB_BACKUP_MODE
+from utils.db_changelog import install_changelog
 
 # 환경 변수 로드
 load_dotenv()
@@ -78,12 +90,8 @@ def create_app():
     app.register_blueprint(push_bp)
 
     # 템플릿 필터
-    @app.template_filter('from_json')
-    def from_json_filter(value):
-        if isinstance(value, str):
-            try: return json.loads(value)
-            except: return []
-        return value
+    app.jinja_env.globals['post_card_html'] = post_card_html
+    app.jinja_env.globals['thumbnail_srcset'] = thumbnail_srcset
 
     @app.template_filter('korean_time')
     def korean_time_filter(dt):
@@ -94,7 +102,7 @@ def create_app():
     # 구글 드라이브 DB 복구
     if db_path and not DATABASE_URL:
         try:
-            if drive_manager.download_database(db_path):
+            if drive_manager.restore_database(db_path):
                 print(f"[Restore] 구글 드라이브로부터 최신 DB를 복구했습니다.")
         except Exception as e:
             print(f"[Restore Error]: {e}")
@@ -102,6 +110,11 @@ def create_app():
     # 데이터베이스 초기화
     with app.app_context():
         db.create_all()
+        upgrade_schema(db)
+        migrate_post_json_columns(db)
+        search_index.init_app(app, db)
+        if db_path and DB_BACKUP_MODE == 'incremental':
+            install_changelog(db)
         from werkzeug.security import generate_password_hash
         admin_user = User.query.filter_by(username='admin').first()
         if not admin_user:
@@ -114,15 +127,20 @@ def create_app():
             db.session.commit()
             print("기본 관리자 계정이 생성되었습니다.")
 
-    # 스케줄러 설정
+    # 스케줄러 및 백그라운드 워커 설정
     setup_scheduler(app)
+    preview_worker.start(app)
+    push_dispatcher.start(app)
+    drive_gc_worker.start(app)
+    image_worker.start(app)
+    thumbnail_prefetcher.start(app)
+    thumbnail_evictor.start(app)
 
     return app
 
 def setup_scheduler(app):
     from apscheduler.schedulers.background import BackgroundScheduler
     import utils.weather_bot as weather_bot
-    from utils.tasks import scheduled_db_sync_task
 
     def scheduled_weather_task():
         with app.app_context():
@@ -130,15 +148,24 @@ def setup_scheduler(app):
             except Exception as e: print(f"Weather Error: {e}")
 
     def sync_task():
+        # 주기적인 동기화도 같은 동기화 워커를 거쳐 쓰기 때문에 생긴 업로드와 겹치지 않도록 함
+        trigger_db_sync()
+
+    def drive_reconcile_task():
         with app.app_context():
-            scheduled_db_sync_task()
+            try: reconcile_drive_files()
+            except Exception as e: print(f"Drive GC Error: {e}")
 
     scheduler = BackgroundScheduler(timezone='Asia/Seoul')
     scheduler.add_job(func=scheduled_weather_task, trigger='cron', hour=6, minute=0)
     scheduler.add_job(func=sync_task, trigger='interval', minutes=10)
+    if DRIVE_GC_RECONCILE_HOURS > 0:
+        scheduler.add_job(func=drive_reconcile_task, trigger='interval', hours=DRIVE_GC_RECONCILE_HOURS)
     scheduler.start()
 
-app = create_app()
+# python app.py로 실행하면 이미지 처리 프로세스(spawn)가 이 파일을 __mp_main__으로 다시 읽으므로 그때는 앱을 만들지 않음
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
@@ -2,9 +2,15 @@ from flask import Blueprint, render_template, redirect, url_for, flash, jsonify,
 import io
 from datetime import datetime
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload, selectinload
 from extensions import db
-from models import User, Post, SystemSetting
-from utils.tasks import trigger_db_sync
+from models import User, Post, Comment, SystemSetting
+from utils.tasks import trigger_db_sync, db_sync_worker
+from utils.push_outbox import outbox_stats
+from utils.drive_client import drive_client
+from utils.drive_gc import enqueue_drive_deletions, drive_gc_worker, drive_gc_stats
+from utils.fragment_cache import post_card_cache
+from blueprints.push import delete_subscriptions
 import zipfile
 
 admin_bp = Blueprint('admin', __name__)
@@ -17,7 +23,7 @@ def admin_dashboard():
         return redirect(url_for('main.index'))
     
     users = User.query.all()
-    posts = Post.query.order_by(Post.created_at.desc()).all()
+    posts = Post.query.options(joinedload(Post.author)).order_by(Post.created_at.desc()).all()
     pending_users = User.query.filter_by(is_approved=False).all()
     weather_bot_enabled = SystemSetting.query.get('weather_bot_enabled').value == 'True' if SystemSetting.query.get('weather_bot_enabled') else False
     
@@ -36,6 +42,27 @@ def approve_user(user_id):
     flash(f'{user.username} 승인 완료.', 'success')
     return redirect(url_for('admin.admin_dashboard'))
 
+def remove_user(user):
+    """
+    사용자와 그 사용자의 게시글/댓글/푸시 구독을 삭제합니다.
+    게시글 첨부 파일은 같은 트랜잭션에서 드라이브 삭제 대기열에 넣어 백그라운드에서 정리합니다.
+    """
+    posts = Post.query.filter_by(author_id=user.id).options(selectinload(Post.attachments)).all()
+    enqueue_drive_deletions([attachment.file_id for post in posts for attachment in post.attachments], reason='user')
+    # 다른 사용자의 게시글에 남긴 댓글도 삭제 (댓글 수가 바뀌므로 해당 카드 캐시도 무효화)
+    commented_post_ids = {row.post_id for row in db.session.query(Comment.post_id).filter(Comment.author_id == user.id)}
+    Comment.query.filter_by(author_id=user.id).delete(synchronize_session=False)
+    for post in posts:
+        db.session.delete(post)
+    delete_subscriptions([subscription.id for subscription in user.push_subscriptions])
+    db.session.expire(user, ['push_subscriptions'])
+    db.session.delete(user)
+    db.session.commit()
+    for post_id in commented_post_ids | {post.id for post in posts}:
+        post_card_cache.invalidate(post_id)
+    drive_gc_worker.wake()
+    trigger_db_sync()
+
 @admin_bp.route('/admin/user/<int:user_id>/reject', methods=['POST'])
 @login_required
 def reject_user(user_id):
@@ -44,9 +71,7 @@ def reject_user(user_id):
     
     user = User.query.get_or_404(user_id)
     if user.username != 'admin':
-        db.session.delete(user)
-        db.session.commit()
-        trigger_db_sync()
+        remove_user(user)
         flash(f'{user.username} 거절 완료.', 'warning')
     return redirect(url_for('admin.admin_dashboard'))
 
@@ -58,9 +83,7 @@ def delete_user(user_id):
     
     user = User.query.get_or_404(user_id)
     if user.username != 'admin':
-        db.session.delete(user)
-        db.session.commit()
-        trigger_db_sync()
+        remove_user(user)
         flash('삭제 완료.', 'success')
     return redirect(url_for('admin.admin_dashboard'))
 
@@ -70,7 +93,7 @@ def export_markdown():
     if current_user.username != 'admin':
         return redirect(url_for('main.index'))
     
-    posts = Post.query.order_by(Post.created_at.desc()).all()
+    posts = Post.query.options(joinedload(Post.author)).order_by(Post.created_at.desc()).all()
     zip_buffer = io.BytesIO()
     with zipfile.ZipFile(zip_buffer, 'a', zipfile.ZIP_DEFLATED, False) as zip_file:
         for post in posts:
@@ -91,3 +114,31 @@ def toggle_weather_bot():
     db.session.commit()
     trigger_db_sync()
     return jsonify({'success': True, 'enabled': setting.value == 'True'})
+
+@admin_bp.route('/admin/push-outbox')
+@login_required
+def push_outbox_stats():
+    """푸시 대기열 깊이와 전송 지연 통계 (전송 통계는 요청을 처리한 워커 프로세스 기준)"""
+    if current_user.username != 'admin': return jsonify({'success': False}), 403
+    return jsonify(outbox_stats())
+
+@admin_bp.route('/admin/db-sync')
+@login_required
+def db_sync_stats():
+    """DB 드라이브 동기화 지연(lag)과 업로드 통계 (요청을 처리한 워커 프로세스 기준)"""
+    if current_user.username != 'admin': return jsonify({'success': False}), 403
+    return jsonify(db_sync_worker.stats())
+
+@admin_bp.route('/admin/drive-client')
+@login_required
+def drive_client_stats():
+    """공유 드라이브 클라이언트의 생성/토큰 갱신 횟수와 소요 시간 (요청을 처리한 워커 프로세스 기준)"""
+    if current_user.username != 'admin': return jsonify({'success': False}), 403
+    return jsonify(drive_client.stats())
+
+@admin_bp.route('/admin/drive-gc')
+@login_required
+def drive_gc_queue_stats():
+    """드라이브 파일 삭제 대기열 깊이"""
+    if current_user.username != 'admin': return jsonify({'success': False}), 403
+    return jsonify(drive_gc_stats())
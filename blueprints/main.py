@@ -1,38 +1,85 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, json
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, json, abort, send_file
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload, selectinload
 from extensions import db
-from models import User, Post, Comment
+from models import User, Post, Comment, PostAttachment, PostUrlPreview
 from utils.tasks import trigger_db_sync
-from utils.url_utils import URLPreviewGenerator
+from utils.url_utils import url_preview_generator
 from utils.google_drive_utils import drive_manager
-from concurrent.futures import ThreadPoolExecutor
+from utils.pagination import keyset_paginate
+from utils.fragment_cache import post_card_cache
+from utils.search_index import search_index
+from utils.preview_worker import URL_PREVIEW_MODE, STALE_AFTER, enqueue_post as enqueue_preview_enrichment
+from utils.push_outbox import enqueue_push
+from utils.drive_gc import enqueue_drive_deletions, drive_gc_worker
+from utils.image_pipeline import enqueue_post as enqueue_image_processing
+from utils.upload_proxy import upload_proxy, parse_content_range, UploadOffsetMismatch, UploadSessionError, UPLOAD_PROXY_MODE, UPLOAD_SEGMENT_SIZE
+from utils.thumbnail_links import thumbnail_links, sized_link, prefetch_async as prefetch_thumbnail_links
+from utils.thumbnail_store import thumbnail_store, FORMATS, THUMBNAIL_CACHE_MAX_AGE
 import io
+import os
 
 main_bp = Blueprint('main', __name__)
-url_preview_generator = URLPreviewGenerator()
+
+FEED_PAGE_SIZE = 10
+MEDIA_PAGE_SIZE = 24
+SEARCH_PAGE_SIZE = 20
+SEARCH_USER_LIMIT = 20
+URL_PREVIEW_DEADLINE = float(os.environ.get('URL_PREVIEW_DEADLINE', 8))
+
+def post_card_options():
+    """게시글 카드 렌더링에 필요한 연관 데이터를 페이지 단위로 한 번에 로드"""
+    return (
+        joinedload(Post.author),
+        selectinload(Post.attachments),
+        selectinload(Post.link_previews),
+    )
+
+def get_feed_page(cursor=None, query=None, per_page=FEED_PAGE_SIZE):
+    """공개 피드 한 페이지 조회 (커서 기반, 페이지 깊이와 무관하게 일정한 비용)"""
+    if query is None:
+        query = Post.query.filter_by(is_public=True)
+    try:
+        posts, next_cursor = keyset_paginate(
+            query.options(*post_card_options()),
+            Post.created_at, Post.id,
+            cursor=cursor, per_page=per_page
+        )
+    except ValueError:
+        abort(400)
+    prefetch_thumbnails(posts)
+    return posts, next_cursor
+
+def prefetch_thumbnails(posts):
+    """
+    로컬 썸네일 저장소에 아직 없는 이미지의 드라이브 링크만 백그라운드에서 배치 요청으로 미리 캐시.
+    (링크는 저장소에 없는 썸네일을 처음 만들 때만 필요하므로 렌더링은 드라이브를 기다리지 않음)
+    """
+    prefetch_thumbnail_links([
+        att.file_id for post in posts for att in post.attachments
+        if att.is_image and not thumbnail_store.has(att.file_id)
+    ])
 
 @main_bp.route('/')
 def index():
     if current_user.is_authenticated:
-        page = request.args.get('page', 1, type=int)
-        pagination = Post.query.filter_by(is_public=True).order_by(Post.created_at.desc()).paginate(page=page, per_page=10)
-        posts = pagination.items
-        return render_template('index.html', posts=posts, has_next=pagination.has_next)
+        posts, next_cursor = get_feed_page()
+        return render_template('index.html', posts=posts, has_next=next_cursor is not None, next_cursor=next_cursor)
     return redirect(url_for('auth.login'))
 
 @main_bp.route('/posts/load-more')
 @login_required
 def load_more():
-    page = request.args.get('page', 1, type=int)
-    pagination = Post.query.filter_by(is_public=True).order_by(Post.created_at.desc()).paginate(page=page, per_page=10)
+    posts, next_cursor = get_feed_page(request.args.get('cursor'))
     
     html_snippets = []
-    for post in pagination.items:
+    for post in posts:
         html_snippets.append(render_template('partials/_post_card.html', post=post))
     
     return jsonify({
         'html': "".join(html_snippets),
-        'has_next': pagination.has_next
+        'has_next': next_cursor is not None,
+        'next_cursor': next_cursor
     })
 
 @main_bp.route('/search')
@@ -42,16 +89,39 @@ def search():
     if not query:
         return redirect(url_for('main.index'))
     
-    # Search in post content and author username
-    posts = Post.query.join(User).filter(
-        (Post.content.like(f'%{query}%')) | 
-        (User.username.like(f'%{query}%'))
-    ).filter(Post.is_public == True).order_by(Post.created_at.desc()).all()
+    page = request.args.get('page', 1, type=int)
+    
+    # 전문 검색 색인에서 관련도 순으로 게시글 ID를 얻은 뒤 카드 데이터를 한 번에 로드
+    post_ids, has_next = search_index.search_post_ids(query, page=page, per_page=SEARCH_PAGE_SIZE)
+    posts_by_id = {p.id: p for p in Post.query.filter(Post.id.in_(post_ids)).options(*post_card_options())} if post_ids else {}
+    posts = [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
+    prefetch_thumbnails(posts)
     
     # Search for users
-    users = User.query.filter(User.username.like(f'%{query}%')).all()
+    users = User.query.filter(User.username.like(f'%{query}%')).order_by(User.username).limit(SEARCH_USER_LIMIT).all() if page == 1 else []
     
-    return render_template('search_results.html', posts=posts, users=users, query=query)
+    return render_template('search_results.html', posts=posts, users=users, query=query, page=page, has_next=has_next)
+
+@main_bp.route('/media')
+@login_required
+def media():
+    """이미지/동영상이 첨부된 공개 게시글 모아보기"""
+    media_type = request.args.get('type')
+    if media_type == 'image':
+        mime_filter = PostAttachment.mime_prefix('image/')
+    elif media_type == 'video':
+        mime_filter = PostAttachment.mime_prefix('video/')
+    else:
+        media_type = None
+        mime_filter = db.or_(PostAttachment.mime_prefix('image/'), PostAttachment.mime_prefix('video/'))
+
+    media_post_ids = db.select(PostAttachment.post_id).where(mime_filter)
+    posts, next_cursor = get_feed_page(
+        request.args.get('cursor'),
+        query=Post.query.filter(Post.is_public == True, Post.id.in_(media_post_ids)),
+        per_page=MEDIA_PAGE_SIZE
+    )
+    return render_template('media.html', posts=posts, media_type=media_type, next_cursor=next_cursor)
 
 @main_bp.route('/api/upload/init', methods=['POST'])
 @login_required
@@ -67,31 +137,84 @@ def upload_init():
     origin = request.headers.get('Origin')
     upload_url = drive_manager.create_upload_session(filename, mimetype, origin=origin)
     if upload_url:
-        return jsonify({'success': True, 'upload_url': upload_url})
+        result = {'success': True, 'upload_url': upload_url, 'proxy': UPLOAD_PROXY_MODE}
+        if UPLOAD_PROXY_MODE != 'off':
+            # 직접 업로드가 막혔을 때 서버를 거쳐 같은 세션으로 이어서 보낼 수 있도록 등록
+            result['upload_id'] = upload_proxy.register(upload_url, current_user.id)
+            result['segment_size'] = UPLOAD_SEGMENT_SIZE
+        return jsonify(result)
     return jsonify({'success': False, 'error': '업로드 세션 생성 실패'}), 500
 
+@main_bp.route('/api/upload/proxy/<upload_id>', methods=['PUT'])
+@login_required
+def upload_proxy_put(upload_id):
+    """
+    서버 경유 업로드: Content-Range 구간의 본문을 읽는 대로 드라이브 세션에 전달 (파일 전체를 쌓지 않음).
+    응답의 offset부터 다음 구간을 보내면 되고, 파일이 끝나면 file_id를 반환합니다.
+    """
+    session_uri = upload_proxy.session_uri(upload_id, current_user.id) if UPLOAD_PROXY_MODE != 'off' else None
+    if not session_uri:
+        return jsonify({'success': False, 'error': '업로드 세션을 찾을 수 없습니다.'}), 404
+    content_range = parse_content_range(request.headers.get('Content-Range'))
+    if not content_range or request.content_length != content_range[1] - content_range[0] + 1:
+        return jsonify({'success': False, 'error': 'Content-Range가 올바르지 않습니다.'}), 400
+
+    start, end, total = content_range
+    try:
+        status, value = upload_proxy.forward(request.stream, session_uri, start, end, total)
+    except UploadOffsetMismatch as e:
+        return jsonify({'success': False, 'offset': e.offset}), 409
+    except UploadSessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 410
+    except Exception as e:
+        print(f"업로드 중계 오류: {e}")
+        return jsonify({'success': False, 'error': '드라이브 전송 중 오류가 발생했습니다.'}), 502
+    if status == 'complete':
+        return jsonify({'success': True, 'complete': True, 'file_id': value.get('id')})
+    return jsonify({'success': True, 'complete': False, 'offset': value})
+
+@main_bp.route('/api/upload/proxy/<upload_id>', methods=['GET'])
+@login_required
+def upload_proxy_status(upload_id):
+    """서버 경유 업로드 재개: 드라이브에 저장된 위치(offset) 또는 완료된 file_id"""
+    session_uri = upload_proxy.session_uri(upload_id, current_user.id) if UPLOAD_PROXY_MODE != 'off' else None
+    total = request.args.get('total', type=int)
+    if not session_uri or total is None:
+        return jsonify({'success': False, 'error': '업로드 세션을 찾을 수 없습니다.'}), 404
+    try:
+        status, value = upload_proxy.query(session_uri, total)
+    except UploadSessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 410
+    except Exception as e:
+        print(f"업로드 상태 조회 오류: {e}")
+        return jsonify({'success': False, 'error': '드라이브 상태 조회 중 오류가 발생했습니다.'}), 502
+    if status == 'complete':
+        return jsonify({'success': True, 'complete': True, 'file_id': value.get('id')})
+    return jsonify({'success': True, 'complete': False, 'offset': value})
+
 @main_bp.route('/api/upload/complete', methods=['POST'])
 @login_required
 def upload_complete():
+    """업로드 완료 처리. file_ids 목록을 보내면 여러 파일을 드라이브 배치 요청 한 번으로 처리"""
     data = request.get_json()
-    file_id = data.get('file_id')
+    file_ids = data.get('file_ids') or ([data['file_id']] if data.get('file_id') else [])
     
-    if not file_id:
+    if not file_ids:
         return jsonify({'success': False, 'error': '파일 ID가 필요합니다.'}), 400
         
-    file_info = drive_manager.complete_upload(file_id)
-    if file_info:
-        return jsonify({
-            'success': True,
-            'file': {
-                'id': file_info.get('id'),
-                'name': file_info.get('name'),
-                'view_link': file_info.get('webViewLink'),
-                'download_link': file_info.get('webContentLink'),
-                'mime_type': file_info.get('mimeType'),
-                'size': file_info.get('size')
-            }
-        })
+    completed = drive_manager.complete_uploads(file_ids)
+    if completed and all(completed.get(file_id) for file_id in file_ids):
+        files = [{
+            'id': file_info.get('id'),
+            'name': file_info.get('name'),
+            'view_link': file_info.get('webViewLink'),
+            'download_link': file_info.get('webContentLink'),
+            'mime_type': file_info.get('mimeType'),
+            'size': file_info.get('size')
+        } for file_info in (completed[file_id] for file_id in file_ids)]
+        if 'file_ids' in data:
+            return jsonify({'success': True, 'files': files})
+        return jsonify({'success': True, 'file': files[0]})
     return jsonify({'success': False, 'error': '업로드 완료 처리 실패'}), 500
 
 @main_bp.route('/post/new', methods=['GET', 'POST'])
@@ -104,46 +227,50 @@ def new_post():
         # 직접 업로드된 파일 정보 (JSON 문자열)
         uploaded_files_json = request.form.get('uploaded_files')
         uploaded_files = json.loads(uploaded_files_json) if uploaded_files_json else []
-        
-        urls = url_preview_generator.extract_urls(content)
-        url_previews = []
-        for url in urls:
-            preview = url_preview_generator.get_url_preview(url)
-            if preview:
-                url_previews.append(preview)
+        # 파일 ID는 썸네일/임시 파일 경로에도 쓰이므로 드라이브 ID 형식이 아니면 거부 (경로 조작 방지)
+        if not isinstance(uploaded_files, list) or not all(
+            isinstance(f, dict) and thumbnail_store.valid_id(f.get('id')) for f in uploaded_files
+        ):
+            flash('첨부 파일 정보가 올바르지 않습니다.', 'error')
+            return render_template('new_post.html'), 400
         
         if not content and not uploaded_files:
             flash('내용을 입력하거나 파일을 첨부해 주세요.', 'error')
             return render_template('new_post.html')
             
-        from utils.tasks import trigger_db_sync
-        trigger_db_sync()
         post = Post(
             content=content,
             author_id=current_user.id,
             is_public=is_public,
-            url_previews=json.dumps(url_previews, ensure_ascii=False),
-            files=json.dumps(uploaded_files, ensure_ascii=False)
+            attachments=[PostAttachment.from_upload(f, position=i) for i, f in enumerate(uploaded_files)]
         )
+        
+        urls = url_preview_generator.extract_urls(content or '')
+        if URL_PREVIEW_MODE == 'async':
+            # 외부 사이트를 기다리지 않고 자리표시만 저장한 뒤 백그라운드에서 미리보기를 채움
+            post.link_previews = [PostUrlPreview.pending(url, position=i, retry_after=STALE_AFTER) for i, url in enumerate(urls)]
+        else:
+            # 여러 링크의 미리보기를 병렬로 가져오되 전체 대기 시간은 URL_PREVIEW_DEADLINE 이내로 제한
+            url_previews = url_preview_generator.get_url_previews(urls, deadline=URL_PREVIEW_DEADLINE)
+            post.link_previews = [PostUrlPreview.from_preview(p, position=i) for i, p in enumerate(url_previews)]
         db.session.add(post)
         db.session.commit()
+        trigger_db_sync()
+        if any(preview.is_pending for preview in post.link_previews):
+            enqueue_preview_enrichment(post.id)
+        if any(attachment.is_image for attachment in post.attachments):
+            enqueue_image_processing(post.id)
 
-        # 푸시 알림 전송 (백그라운드)
-        def notify_new_post(post_id, author_id, author_name):
-            from blueprints.push import send_push_to_user
-            from models import User
-            # 자신을 제외한 모든 승인된 사용자에게 알림
-            users = User.query.filter(User.id != author_id, User.is_approved == True).all()
-            for user in users:
-                send_push_to_user(
-                    user, 
-                    title=f"새 게시글: {author_name}", 
-                    body=content[:50] + "..." if len(content) > 50 else content,
-                    url=url_for('main.view_post', post_id=post_id, _external=True)
-                )
-        
-        executor = ThreadPoolExecutor(max_workers=1)
-        executor.submit(notify_new_post, post.id, current_user.id, current_user.username)
+        # 푸시 알림 대기열에 등록 (전송은 백그라운드 디스패처): 자신을 제외한 모든 승인된 사용자에게 알림
+        enqueue_push(
+            title=f"새 게시글: {current_user.username}",
+            body=(content[:50] + "..." if len(content) > 50 else content) if content else '새 파일을 올렸습니다.',
+            url=url_for('main.view_post', post_id=post.id, _external=True),
+            exclude_user_id=current_user.id,
+            collapse_key='new_post',
+            digest="새 게시글 {count}개",
+            digest_url=url_for('main.index', _external=True)
+        )
         
         flash('게시글이 작성되었습니다!', 'success')
         return jsonify({'success': True, 'redirect': url_for('main.index')}) if request.headers.get('X-Requested-With') == 'XMLHttpRequest' else redirect(url_for('main.index'))
@@ -157,9 +284,8 @@ def view_post(post_id):
         flash('접근 권한이 없습니다.', 'error')
         return redirect(url_for('main.index'))
     
-    url_previews = json.loads(post.url_previews) if post.url_previews else []
-    files = json.loads(post.files) if post.files else []
-    return render_template('view_post.html', post=post, url_previews=url_previews, files=files)
+    prefetch_thumbnails([post])
+    return render_template('view_post.html', post=post, url_previews=post.link_previews, files=post.attachments)
 
 @main_bp.route('/post/<int:post_id>/comment', methods=['POST'])
 @login_required
@@ -173,24 +299,19 @@ def add_comment(post_id):
     comment = Comment(content=content, author_id=current_user.id, post_id=post_id)
     db.session.add(comment)
     db.session.commit()
+    post_card_cache.invalidate(post_id)
     trigger_db_sync()
 
     # 푸시 알림 전송 (포스트 작성자에게)
     if post.author_id != current_user.id:
-        def notify_new_comment(author_id, commenter_name, post_id, comment_content):
-            from blueprints.push import send_push_to_user
-            from models import User
-            author = User.query.get(author_id)
-            if author:
-                send_push_to_user(
-                    author,
-                    title=f"새 댓글: {commenter_name}",
-                    body=comment_content[:50] + "..." if len(comment_content) > 50 else comment_content,
-                    url=url_for('main.view_post', post_id=post_id, _external=True)
-                )
-        
-        executor = ThreadPoolExecutor(max_workers=1)
-        executor.submit(notify_new_comment, post.author_id, current_user.username, post.id, content)
+        enqueue_push(
+            title=f"새 댓글: {current_user.username}",
+            body=content[:50] + "..." if len(content) > 50 else content,
+            url=url_for('main.view_post', post_id=post.id, _external=True),
+            user_ids=[post.author_id],
+            collapse_key=f'comment:{post.id}',
+            digest="내 게시글에 새 댓글 {count}개"
+        )
     
     flash('댓글이 작성되었습니다!', 'success')
     
@@ -215,16 +336,12 @@ def delete_post(post_id):
         flash('삭제 권한이 없습니다.', 'error')
         return redirect(url_for('main.index'))
     
-    if post.files:
-        try:
-            for file_info in json.loads(post.files):
-                if file_info.get('id'):
-                    drive_manager.delete_file(file_info.get('id'))
-        except Exception as e:
-            print(f"파일 삭제 오류: {e}")
-            
+    # 첨부 파일은 같은 트랜잭션에서 삭제 대기열에 넣고, 실제 삭제는 백그라운드 작업이 배치로 처리
+    enqueue_drive_deletions([attachment.file_id for attachment in post.attachments])
     db.session.delete(post)
     db.session.commit()
+    drive_gc_worker.wake()
+    post_card_cache.invalidate(post_id)
     trigger_db_sync()
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -236,36 +353,42 @@ def delete_post(post_id):
 @main_bp.route('/profile')
 @login_required
 def profile():
-    user_posts = Post.query.filter_by(author_id=current_user.id).order_by(Post.created_at.desc()).all()
+    user_posts = Post.query.filter_by(author_id=current_user.id).options(joinedload(Post.author)).order_by(Post.created_at.desc()).all()
     return render_template('profile.html', user_posts=user_posts)
 
 @main_bp.route('/file/thumbnail/<file_id>')
 def get_thumbnail(file_id):
     """
-    구글 드라이브의 임시 썸네일 링크는 몇 시간 후 만료되므로, 
-    영구적인 접근을 위해 서버 측에서 리다이렉트해주는 엔드포인트입니다.
+    로컬 썸네일 저장소에서 요청한 너비(?w=)에 맞는 WebP/JPEG 썸네일을 제공합니다.
+    같은 파일 ID의 이미지는 바뀌지 않으므로 ETag와 immutable 캐시 헤더를 붙여 브라우저가 다시 받지 않게 합니다.
+    저장소에 만들 수 없으면 구글 드라이브 썸네일로 리다이렉트합니다.
     """
+    width = thumbnail_store.pick_width(request.args.get('w', type=int))
+    fmt = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpg'
+    path = None
+    if thumbnail_store.valid_id(file_id):
+        path = thumbnail_store.get(file_id, width, fmt)
+    if path:
+        response = send_file(
+            path, mimetype=FORMATS[fmt][1], etag=thumbnail_store.etag(path),
+            max_age=THUMBNAIL_CACHE_MAX_AGE, conditional=True
+        )
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add('Accept')
+        return response
+
     try:
-        # 파일 정보 가져오기 (가장 최신의 썸네일 링크 획득)
-        file_info = drive_manager.service.files().get(
-            fileId=file_id, 
-            fields='thumbnailLink'
-        ).execute()
-        
-        thumbnail_link = file_info.get('thumbnailLink')
+        # 캐시된 썸네일 링크 사용 (없을 때만 드라이브에서 최신 링크 획득)
+        thumbnail_link = thumbnail_links.get(file_id)
         if thumbnail_link:
-            # 해상도 조절 (기본값은 작으므로 s1000으로 확장)
-            if '=s' in thumbnail_link:
-                thumbnail_link = thumbnail_link.split('=s')[0] + '=s1000'
-            else:
-                thumbnail_link += '=s1000'
-            return redirect(thumbnail_link)
+            return redirect(sized_link(thumbnail_link, width))
         
         # 썸네일이 없는 경우 (방금 업로드했거나 지원하지 않는 경우) 폴백
-        return redirect(f"https://drive.google.com/thumbnail?id={file_id}&sz=w1000")
+        return redirect(f"https://drive.google.com/thumbnail?id={file_id}&sz=w{width}")
     except Exception as e:
         print(f"썸네일 가져오기 오류: {e}")
-        return redirect(f"https://drive.google.com/thumbnail?id={file_id}&sz=w1000")
+        return redirect(f"https://drive.google.com/thumbnail?id={file_id}&sz=w{width}")
 
 @main_bp.route('/ping')
 def ping():
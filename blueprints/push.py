@@ -1,16 +1,27 @@
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
 from flask import Blueprint, request, jsonify
 from flask_login import current_user, login_required
 from extensions import db
-from models import PushSubscription
-from pywebpush import webpush, WebPushException
+from models import PushSubscription, PushOutbox, User
+from pywebpush import WebPushException
+from utils.push_client import WebPushClient
+from utils.push_outbox import enqueue_push
 
 push_bp = Blueprint('push', __name__)
 
 VAPID_PUBLIC_KEY = os.environ.get('VAPID_PUBLIC_KEY')
 VAPID_PRIVATE_KEY = os.environ.get('VAPID_PRIVATE_KEY')
 VAPID_CLAIM_EMAIL = os.environ.get('VAPID_CLAIM_EMAIL', 'mailto:admin@example.com')
+PUSH_MAX_WORKERS = int(os.environ.get('PUSH_MAX_WORKERS', 8))
+PUSH_TIMEOUT = float(os.environ.get('PUSH_TIMEOUT', 10))
+# 일시적인 오류로 보고 다시 시도할 푸시 서비스 응답 코드
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# 구독별 webpush 호출을 병렬로 보내는 풀
+push_executor = ThreadPoolExecutor(max_workers=PUSH_MAX_WORKERS, thread_name_prefix='push-send')
+# VAPID 서명을 푸시 서비스별로 캐시하고 연결을 재사용하는 전송 클라이언트
+push_client = WebPushClient(VAPID_PRIVATE_KEY, VAPID_CLAIM_EMAIL, timeout=PUSH_TIMEOUT, pool_maxsize=PUSH_MAX_WORKERS)
 
 @push_bp.route('/push-key', methods=['GET'])
 def get_push_key():
@@ -62,36 +73,54 @@ def unsubscribe():
     
     return jsonify({'status': 'not found'}), 404
 
+def _subscription_info(sub):
+    return {
+        "endpoint": sub.endpoint,
+        "keys": {
+            "p256dh": sub.p256dh,
+            "auth": sub.auth
+        }
+    }
+
+def deliver_push(sub, data):
+    """
+    구독 하나에 푸시를 전송.
+    반환값: (결과, 오류 메시지) - 결과는 'sent', 'expired'(404/410, 구독 삭제 대상),
+    'retry'(네트워크 오류/429/5xx 등 일시적 실패), 'failed'(그 밖의 영구 실패) 중 하나
+    """
+    try:
+        push_client.send(_subscription_info(sub), data)
+        return 'sent', None
+    except WebPushException as ex:
+        status = ex.response.status_code if ex.response is not None else None
+        if status in (404, 410):
+            return 'expired', str(ex)
+        if status is None or status in RETRYABLE_STATUS:
+            return 'retry', str(ex)
+        return 'failed', str(ex)
+    except Exception as ex:
+        return 'retry', str(ex)
+
+def delete_subscriptions(subscription_ids):
+    """만료된 구독과 그 구독으로 보낼 대기 중인 알림을 한 번에 삭제 (commit은 호출한 쪽에서)"""
+    if not subscription_ids:
+        return
+    PushOutbox.query.filter(PushOutbox.subscription_id.in_(subscription_ids)).delete(synchronize_session=False)
+    PushSubscription.query.filter(PushSubscription.id.in_(subscription_ids)).delete(synchronize_session=False)
+    print(f"[Push] 만료된 구독 {len(subscription_ids)}개 삭제")
+
+def target_subscriptions(user_ids=None, exclude_user_id=None):
+    """
+    승인된 사용자들의 구독을 한 번의 조인 쿼리로 조회.
+    user_ids를 주면 해당 사용자들만, 없으면 승인된 모든 사용자가 대상입니다.
+    """
+    query = PushSubscription.query.join(User, User.id == PushSubscription.user_id).filter(User.is_approved == True)
+    if user_ids is not None:
+        query = query.filter(PushSubscription.user_id.in_(user_ids))
+    if exclude_user_id is not None:
+        query = query.filter(PushSubscription.user_id != exclude_user_id)
+    return query
+
 def send_push_to_user(user, title, body, url='/'):
-    subscriptions = PushSubscription.query.filter_by(user_id=user.id).all()
-    results = []
-    
-    for sub in subscriptions:
-        try:
-            webpush(
-                subscription_info={
-                    "endpoint": sub.endpoint,
-                    "keys": {
-                        "p256dh": sub.p256dh,
-                        "auth": sub.auth
-                    }
-                },
-                data=json.dumps({
-                    "title": title,
-                    "body": body,
-                    "url": url
-                }),
-                vapid_private_key=VAPID_PRIVATE_KEY,
-                vapid_claims={
-                    "sub": VAPID_CLAIM_EMAIL
-                }
-            )
-            results.append(True)
-        except WebPushException as ex:
-            print(f"Push failed: {ex}")
-            # 구독이 만료되었거나 유효하지 않은 경우 삭제
-            if ex.response and ex.response.status_code in [404, 410]:
-                db.session.delete(sub)
-                db.session.commit()
-            results.append(False)
-    return results
+    """한 사용자의 모든 기기에 알림 (대기열에 등록만 하고 전송은 백그라운드 디스패처가 수행)"""
+    return enqueue_push(title=title, body=body, url=url, user_ids=[user.id])
@@ -23,18 +23,158 @@ class Post(db.Model):
     created_at = db.Column(db.DateTime, default=get_korean_time_for_db)
     updated_at = db.Column(db.DateTime, default=get_korean_time_for_db, onupdate=get_korean_time_for_db)
     is_public = db.Column(db.Boolean, default=True)
+    # 레거시 JSON 컬럼: 기존 데이터는 시작 시 PostAttachment/PostUrlPreview로 이전되며 새로 기록하지 않음
     url_previews = db.Column(db.Text, default='[]')
     files = db.Column(db.Text, default='[]')
     
     comments = db.relationship('Comment', backref='post', lazy=True, cascade='all, delete-orphan')
+    attachments = db.relationship('PostAttachment', backref='post', lazy=True, cascade='all, delete-orphan',
+                                  order_by='PostAttachment.position')
+    link_previews = db.relationship('PostUrlPreview', backref='post', lazy=True, cascade='all, delete-orphan',
+                                    order_by='PostUrlPreview.position')
+
+    # 피드 키셋 페이지네이션용 복합 인덱스 (is_public, created_at, id)
+    __table_args__ = (
+        db.Index('ix_post_feed', 'is_public', 'created_at', 'id'),
+    )
 
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
+    # SQLite는 외래 키에 인덱스를 만들지 않으므로 카드별 댓글 수 서브쿼리가 comment 전체를 훑지 않도록 직접 지정
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=get_korean_time_for_db)
 
+# 댓글 수는 카드 렌더링마다 comments 전체를 불러오지 않도록 상관 서브쿼리로 함께 조회
+Post.comment_count = db.column_property(
+    db.select(db.func.count(Comment.id))
+    .where(Comment.post_id == Post.id)
+    .correlate_except(Comment)
+    .scalar_subquery()
+)
+
+class PostAttachment(db.Model):
+    """게시글 첨부 파일 (구글 드라이브)"""
+    id = db.Column(db.Integer, primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, default=0)
+    file_id = db.Column(db.String(128), nullable=False, index=True)
+    name = db.Column(db.String(255))
+    mime_type = db.Column(db.String(127), default='application/octet-stream')
+    size = db.Column(db.BigInteger)
+    view_link = db.Column(db.Text)
+    download_link = db.Column(db.Text)
+    embed_link = db.Column(db.Text)
+    # 이미지 처리 결과 (utils.image_pipeline): 레이아웃 자리 확보용 크기와 흐린 자리표시 이미지(data URI)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    placeholder = db.Column(db.Text)
+    image_attempts = db.Column(db.Integer)
+    # 여러 워커가 같은 이미지를 중복 처리하지 않도록 선점 표시
+    image_claim_token = db.Column(db.String(32), index=True)
+    image_claimed_at = db.Column(db.DateTime)
+
+    # 미디어 갤러리 조회용 (mime_type 범위 검색 → post_id)
+    __table_args__ = (
+        db.Index('ix_post_attachment_mime_post', 'mime_type', 'post_id'),
+    )
+
+    @property
+    def is_image(self):
+        return (self.mime_type or '').startswith('image/')
+
+    @property
+    def is_video(self):
+        return (self.mime_type or '').startswith('video/')
+
+    @property
+    def placeholder_style(self):
+        """이미지가 도착하기 전까지 보여 줄 흐린 자리표시 배경 (처리 전이면 빈 문자열)"""
+        if not self.placeholder:
+            return ''
+        return f"background: url('{self.placeholder}') center / cover no-repeat;"
+
+    @classmethod
+    def mime_prefix(cls, prefix):
+        """mime_type LIKE 'image/%' 대신 인덱스를 타는 범위 조건 생성"""
+        return db.and_(cls.mime_type >= prefix, cls.mime_type < prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+    @classmethod
+    def from_upload(cls, file_info, position=0):
+        """업로드 완료 API가 반환한 파일 정보(dict)로부터 생성"""
+        size = file_info.get('size')
+        return cls(
+            position=position,
+            file_id=file_info.get('id'),
+            name=file_info.get('name'),
+            mime_type=file_info.get('mime_type') or 'application/octet-stream',
+            size=int(size) if size not in (None, '') else None,
+            view_link=file_info.get('view_link'),
+            download_link=file_info.get('download_link'),
+            embed_link=file_info.get('embed_link')
+        )
+
+class PostUrlPreview(db.Model):
+    """게시글 본문 URL의 미리보기 정보"""
+    id = db.Column(db.Integer, primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, default=0)
+    type = db.Column(db.String(20), default='website')
+    url = db.Column(db.Text, nullable=False)
+    title = db.Column(db.Text)
+    description = db.Column(db.Text)
+    image_url = db.Column(db.Text)
+    site_name = db.Column(db.String(255))
+    video_id = db.Column(db.String(32))
+    author_name = db.Column(db.String(255))
+    thumbnail_url = db.Column(db.Text)
+    # 'ready': 미리보기 완료, 'pending': 가져오기 대기, 'fetching': 워커가 선점해 가져오는 중
+    # (pending/fetching이면 카드에는 자리표시만 렌더링)
+    status = db.Column(db.String(20), default='ready', index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime)
+    claim_token = db.Column(db.String(32), index=True)
+    claimed_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_post_url_preview_due', 'status', 'next_attempt_at'),
+    )
+
+    @property
+    def is_pending(self):
+        return self.status in ('pending', 'fetching')
+
+    def apply_preview(self, preview):
+        """URLPreviewGenerator가 반환한 미리보기(dict) 내용을 채우고 완료 상태로 변경"""
+        self.type = preview.get('type', 'website')
+        self.url = preview.get('url') or self.url
+        self.title = preview.get('title')
+        self.description = preview.get('description')
+        self.image_url = preview.get('image_url')
+        self.site_name = preview.get('site_name')
+        self.video_id = preview.get('video_id')
+        self.author_name = preview.get('author_name')
+        self.thumbnail_url = preview.get('thumbnail_url')
+        self.status = 'ready'
+        self.claim_token = None
+
+    @classmethod
+    def from_preview(cls, preview, position=0):
+        """URLPreviewGenerator가 반환한 미리보기(dict)로부터 생성"""
+        instance = cls(position=position)
+        instance.apply_preview(preview)
+        return instance
+
+    @classmethod
+    def pending(cls, url, position=0, retry_after=None):
+        """
+        미리보기를 나중에 채울 자리표시 행 생성.
+        저장한 워커가 바로 처리하며, retry_after가 지나도 남아 있으면 다른 워커의 주기 정리 대상이 됩니다.
+        """
+        return cls(position=position, url=url, status='pending',
+                   next_attempt_at=get_korean_time_for_db() + retry_after if retry_after else None)
+
 class SystemSetting(db.Model):
     key = db.Column(db.String(50), primary_key=True)
     value = db.Column(db.Text, nullable=True)
@@ -49,3 +189,49 @@ class PushSubscription(db.Model):
 
     user = db.relationship('User', backref=db.backref('push_subscriptions', lazy=True))
 
+class PushOutbox(db.Model):
+    """
+    웹 푸시 전송 대기열 (구독 1개당 1행).
+    요청 처리 중에는 행만 추가하고, 백그라운드 디스패처가 배치 단위로 가져가 전송합니다.
+    일시적인 실패는 next_attempt_at을 지수적으로 늦춰 재시도합니다.
+    전송에 성공한 행은 기기별 전송 한도 계산을 위해 잠시 'sent'로 남겨 두었다가 정리합니다.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    subscription_id = db.Column(db.Integer, db.ForeignKey('push_subscription.id'), nullable=False, index=True)
+    payload = db.Column(db.Text, nullable=False)  # {"title", "body", "url", "digest", "digest_url"} JSON
+    status = db.Column(db.String(10), nullable=False, default='pending')  # 'pending', 'sending', 'sent', 'failed'
+    collapse_key = db.Column(db.String(64))  # 같은 키의 대기 중인 알림은 하나로 합쳐짐 (예: 'comment:12')
+    event_count = db.Column(db.Integer, nullable=False, default=1)  # 합쳐진 이벤트 수
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=get_korean_time_for_db)
+    claim_token = db.Column(db.String(32), index=True)
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=get_korean_time_for_db)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_push_outbox_due', 'status', 'next_attempt_at'),
+        db.Index('ix_push_outbox_collapse', 'subscription_id', 'collapse_key', 'status'),
+    )
+
+class DriveDeletion(db.Model):
+    """
+    구글 드라이브 파일 삭제 대기열 (파일 1개당 1행).
+    게시글/사용자를 삭제할 때 같은 트랜잭션에서 행만 추가하고, 백그라운드 작업이 배치 요청으로 삭제합니다.
+    실패하면 next_attempt_at을 지수적으로 늦춰 재시도합니다.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    file_id = db.Column(db.String(128), nullable=False, index=True)
+    reason = db.Column(db.String(10), nullable=False, default='post')  # 'post', 'user', 'orphan'
+    status = db.Column(db.String(10), nullable=False, default='pending')  # 'pending', 'deleting', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=get_korean_time_for_db)
+    claim_token = db.Column(db.String(32), index=True)
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=get_korean_time_for_db)
+
+    __table_args__ = (
+        db.Index('ix_drive_deletion_due', 'status', 'next_attempt_at'),
+    )
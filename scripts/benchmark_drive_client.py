@@ -0,0 +1,119 @@
+"""
+구글 드라이브 API 호출 1건당 클라이언트 준비 비용 벤치마크.
+
+로컬에서 OAuth 토큰 엔드포인트와 드라이브 files.list를 흉내 내는 가짜 서버(별도 프로세스)를 띄우고,
+백그라운드 작업처럼 매번 새 스레드에서 드라이브 API를 한 번 호출하면서
+  - 기존 방식: 스레드마다 load_dotenv() + 토큰 갱신 + discovery build 후 호출
+  - 새 방식: utils.drive_client.DriveClientFactory (공유 서비스/자격 증명, 스레드별 연결만 생성)
+의 호출 1건당 CPU 시간(이 프로세스 기준)과 경과 시간을 비교합니다.
+
+사용법:
+    python scripts/benchmark_drive_client.py [--count 100]
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import threading
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 프로젝트 루트 디렉토리를 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request
+from googleapiclient.discovery import build
+from utils.drive_client import DriveClientFactory, DRIVE_SCOPES
+
+
+class FakeGoogleApi(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        # 토큰 갱신
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply({'access_token': 'bench-token', 'expires_in': 3600, 'token_type': 'Bearer'})
+
+    def do_GET(self):
+        # files.list
+        self._reply({'files': [{'id': 'bench', 'name': 'sns.db.gz'}]})
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port):
+    ThreadingHTTPServer(('127.0.0.1', port), FakeGoogleApi).serve_forever()
+
+
+def measure(call, count):
+    def in_new_thread():
+        thread = threading.Thread(target=call)
+        thread.start()
+        thread.join()
+
+    in_new_thread()  # 첫 호출(모듈 로드 등)은 제외
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for _ in range(count):
+        in_new_thread()
+    return (time.process_time() - cpu_started) / count, (time.perf_counter() - started) / count
+
+
+def run(count, port):
+    server = multiprocessing.Process(target=serve, args=(port,), daemon=True)
+    server.start()
+    time.sleep(0.5)
+
+    base_url = f'http://127.0.0.1:{port}'
+    os.environ.setdefault('GOOGLE_CLIENT_ID', 'bench-client')
+    os.environ.setdefault('GOOGLE_CLIENT_SECRET', 'bench-secret')
+    os.environ.setdefault('GOOGLE_REFRESH_TOKEN', 'bench-refresh')
+    client_options = {'api_endpoint': base_url}
+
+    def legacy():
+        load_dotenv()
+        creds = Credentials(
+            None,
+            refresh_token=os.environ['GOOGLE_REFRESH_TOKEN'],
+            token_uri=f'{base_url}/token',
+            client_id=os.environ['GOOGLE_CLIENT_ID'],
+            client_secret=os.environ['GOOGLE_CLIENT_SECRET'],
+            scopes=DRIVE_SCOPES
+        )
+        creds.refresh(Request())
+        service = build('drive', 'v3', credentials=creds, client_options=client_options)
+        service.files().list(q="name = 'sns.db.gz'", fields='files(id, name)').execute()
+
+    factory = DriveClientFactory(token_uri=f'{base_url}/token', client_options=client_options)
+
+    def shared():
+        factory.service.files().list(q="name = 'sns.db.gz'", fields='files(id, name)').execute()
+
+    try:
+        print(f"{'mode':<30}{'cpu/call':>14}{'wall/call':>14}")
+        for name, call in (('per-thread build (before)', legacy), ('DriveClientFactory (after)', shared)):
+            cpu, wall = measure(call, count)
+            print(f"{name:<30}{cpu * 1000:>11.3f} ms{wall * 1000:>11.3f} ms")
+        print(f"factory stats: {factory.stats()}")
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='구글 드라이브 클라이언트 준비 비용 벤치마크')
+    parser.add_argument('--count', type=int, default=100)
+    parser.add_argument('--port', type=int, default=8798)
+    args = parser.parse_args()
+    run(args.count, args.port)
@@ -0,0 +1,108 @@
+"""
+웹 푸시 전송 1건당 CPU 비용 벤치마크.
+
+로컬에서 201을 돌려주는 가짜 푸시 서비스(별도 프로세스)를 띄우고 같은 알림을 N번 보내면서
+  - 기존 방식: pywebpush.webpush (매번 VAPID 키 파싱 + JWT 서명, 매번 새 연결)
+  - 새 방식: utils.push_client.WebPushClient (origin별 VAPID 헤더 캐시, keep-alive 연결 풀)
+의 알림 1건당 CPU 시간(이 프로세스 기준)과 경과 시간을 비교합니다.
+페이로드 암호화(ECDH + AES-GCM)는 구독마다 필요하므로 두 방식 모두에 포함됩니다.
+
+사용법:
+    python scripts/benchmark_push.py [--count 300]
+"""
+import os
+import sys
+import time
+import json
+import base64
+import argparse
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 프로젝트 루트 디렉토리를 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from py_vapid import Vapid
+from pywebpush import webpush
+from utils.push_client import WebPushClient
+
+CLAIM_EMAIL = 'mailto:bench@example.com'
+
+
+class FakePushService(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(201)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port):
+    ThreadingHTTPServer(('127.0.0.1', port), FakePushService).serve_forever()
+
+
+def b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def make_subscription(port):
+    """브라우저가 만든 것과 같은 형식의 구독 정보 (p256dh 공개 키 + auth 비밀)"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    public = key.public_key().public_bytes(serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint)
+    return {
+        'endpoint': f'http://127.0.0.1:{port}/push/abc',
+        'keys': {'p256dh': b64url(public), 'auth': b64url(os.urandom(16))}
+    }
+
+
+def measure(send, count):
+    send()  # 첫 호출(키 로드, 연결 생성)은 제외
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for _ in range(count):
+        send()
+    return (time.process_time() - cpu_started) / count, (time.perf_counter() - started) / count
+
+
+def run(count, port):
+    server = multiprocessing.Process(target=serve, args=(port,), daemon=True)
+    server.start()
+    time.sleep(0.5)
+
+    vapid = Vapid()
+    vapid.generate_keys()
+    private_key = b64url(vapid.private_key.private_numbers().private_value.to_bytes(32, 'big'))
+    subscription = make_subscription(port)
+    data = json.dumps({'title': '새 댓글: bench', 'body': '벤치마크 알림입니다', 'url': '/post/1'})
+
+    def legacy():
+        webpush(subscription_info=subscription, data=data, vapid_private_key=private_key,
+                vapid_claims={'sub': CLAIM_EMAIL}, timeout=10)
+
+    client = WebPushClient(private_key, CLAIM_EMAIL)
+
+    def cached():
+        client.send(subscription, data)
+
+    try:
+        print(f"{'mode':<28}{'cpu/notification':>18}{'wall/notification':>20}")
+        for name, send in (('webpush (before)', legacy), ('WebPushClient (after)', cached)):
+            cpu, wall = measure(send, count)
+            print(f"{name:<28}{cpu * 1000:>15.3f} ms{wall * 1000:>17.3f} ms")
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='웹 푸시 전송 CPU 비용 벤치마크')
+    parser.add_argument('--count', type=int, default=300)
+    parser.add_argument('--port', type=int, default=8799)
+    args = parser.parse_args()
+    run(args.count, args.port)
@@ -0,0 +1,171 @@
+"""
+서버 경유 업로드(utils.upload_proxy) 메모리 사용량 벤치마크.
+
+로컬에서 드라이브 재개 가능 업로드 세션을 흉내 내는 가짜 서버(별도 프로세스)를 띄우고,
+브라우저가 보내는 것처럼 파일을 구간(기본 64MB)으로 나누어 werkzeug의 request.stream과 같은 LimitedStream으로
+ResumableUploadProxy.forward에 넘깁니다. 파일 크기를 키워도 이 프로세스의 최대 메모리(RSS)가 늘지 않는지 확인합니다.
+  - 가짜 서버는 가끔 조각의 절반만 저장한 것처럼 응답해, 남은 부분을 다시 보내는 경로도 함께 확인합니다.
+  - --drop을 주면 구간 중간에 연결이 끊긴 상황을 만들고, 저장된 위치를 조회해 이어서 보냅니다.
+  - 서버가 받은 바이트의 SHA-256을 보낸 내용과 비교해 순서/누락 없이 전달되었는지 확인합니다.
+
+사용법:
+    python scripts/benchmark_upload_proxy.py [--sizes 256,1024,4096] [--drop]
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import resource
+import argparse
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 프로젝트 루트 디렉토리를 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.wsgi import LimitedStream
+from utils.upload_proxy import ResumableUploadProxy, DRIVE_CHUNK_UNIT
+
+MB = 1024 * 1024
+SEGMENT_SIZE = 64 * MB
+BLOCK = os.urandom(MB)   # 업로드 내용: 1MB 블록 반복 (양쪽에서 같은 방식으로 체크섬 계산)
+
+
+class FakeResumableSession(BaseHTTPRequestHandler):
+    """PUT /upload/<세션>: Content-Range 조각을 받아 저장 위치를 기록하고 308 또는 완료(200)로 응답"""
+    protocol_version = 'HTTP/1.1'
+    sessions = {}
+
+    def do_PUT(self):
+        session = self.sessions.setdefault(self.path, {'saved': 0, 'sha256': hashlib.sha256(), 'chunks': 0})
+        length = int(self.headers.get('Content-Length', 0))
+        match = re.match(r'bytes (\d+)-(\d+)/(\d+)', self.headers.get('Content-Range', ''))
+        total = int(self.headers['Content-Range'].rsplit('/', 1)[1])
+        if match and int(match.group(1)) == session['saved']:
+            session['chunks'] += 1
+            keep = length
+            if session['chunks'] % 5 == 0 and session['saved'] + length < total:
+                # 가끔 조각의 절반만 저장 (실제 드라이브도 일부만 저장하고 308을 돌려줄 수 있음)
+                keep = (length // 2) // DRIVE_CHUNK_UNIT * DRIVE_CHUNK_UNIT
+            remaining, unhashed = length, keep
+            while remaining:
+                data = self.rfile.read(min(remaining, MB))
+                remaining -= len(data)
+                if unhashed > 0:
+                    session['sha256'].update(data[:unhashed])
+                    unhashed -= len(data[:unhashed])
+            session['saved'] += keep
+        else:
+            self.rfile.read(length)
+
+        if session['saved'] >= total:
+            self._reply(200, {'id': f'bench{self.path.rsplit("/", 1)[1]}', 'sha256': session['sha256'].hexdigest()})
+        else:
+            self.send_response(308)
+            if session['saved']:
+                self.send_header('Range', f"bytes=0-{session['saved'] - 1}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port):
+    ThreadingHTTPServer(('127.0.0.1', port), FakeResumableSession).serve_forever()
+
+
+class PatternStream:
+    """파일 offset부터의 업로드 내용을 만들어 내는 읽기 스트림 (drop_after 바이트 후 연결 끊김 흉내)"""
+
+    def __init__(self, offset, length, drop_after=None):
+        self.position = offset
+        self.remaining = length
+        self.drop_after = drop_after
+
+    def read(self, size=-1):
+        if self.drop_after is not None and self.drop_after <= 0:
+            raise ConnectionResetError('client disconnected')
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        if self.drop_after is not None:
+            size = min(size, self.drop_after)
+            self.drop_after -= size
+        start = self.position % MB
+        size = min(size, MB - start)
+        data = BLOCK[start:start + size]
+        self.position += len(data)
+        self.remaining -= len(data)
+        return data
+
+
+def expected_checksum(total):
+    digest = hashlib.sha256()
+    for offset in range(0, total, MB):
+        digest.update(BLOCK[:min(MB, total - offset)])
+    return digest.hexdigest()
+
+
+def peak_rss_mb():
+    # 리눅스는 KB, macOS는 바이트 단위
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != 'darwin' else peak / MB
+
+
+def upload(proxy, session_uri, total, drop):
+    """브라우저의 proxyUpload와 같은 순서: 구간 전송 → 끊기면 저장 위치 조회 → 이어서 전송"""
+    offset, drops, requests_sent = 0, 0, 0
+    while True:
+        end = min(offset + SEGMENT_SIZE, total) - 1
+        drop_after = None
+        if drop and drops == 0 and offset >= total // 2:
+            drop_after = (end + 1 - offset) // 3 + 12345   # 구간 중간, 256KiB 경계가 아닌 위치에서 끊김
+            drops += 1
+        stream = LimitedStream(PatternStream(offset, end + 1 - offset, drop_after), end + 1 - offset)
+        status, value = proxy.forward(stream, session_uri, offset, end, total)
+        requests_sent += 1
+        if status == 'complete':
+            return value, drops, requests_sent
+        if drop_after is not None:
+            status, value = proxy.query(session_uri, total)
+            if status == 'complete':
+                return value, drops, requests_sent
+        offset = value
+
+
+def run(sizes, drop, port):
+    server = multiprocessing.Process(target=serve, args=(port,), daemon=True)
+    server.start()
+    time.sleep(0.5)
+    proxy = ResumableUploadProxy()
+
+    try:
+        print(f"baseline peak RSS: {peak_rss_mb():.1f} MB (chunk {proxy.chunk_size // MB}MB, segment {SEGMENT_SIZE // MB}MB)")
+        print(f"{'size':>10}{'requests':>10}{'drops':>7}{'MB/s':>9}{'peak RSS':>12}  checksum")
+        for i, size_mb in enumerate(sizes):
+            total = size_mb * MB
+            started = time.perf_counter()
+            result, drops, requests_sent = upload(proxy, f'http://127.0.0.1:{port}/upload/{i}', total, drop)
+            elapsed = time.perf_counter() - started
+            ok = 'ok' if result.get('sha256') == expected_checksum(total) else 'MISMATCH'
+            print(f"{size_mb:>8}MB{requests_sent:>10}{drops:>7}{size_mb / elapsed:>9.0f}{peak_rss_mb():>9.1f} MB  {ok}")
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='서버 경유 업로드 메모리 사용량 벤치마크')
+    parser.add_argument('--sizes', default='256,1024,4096', help='업로드할 파일 크기 목록(MB)')
+    parser.add_argument('--drop', action='store_true', help='구간 중간에 연결이 끊기는 상황 포함')
+    parser.add_argument('--port', type=int, default=8797)
+    args = parser.parse_args()
+    run([int(size) for size in args.sizes.split(',')], args.drop, args.port)
@@ -0,0 +1,124 @@
+"""
+URL 미리보기 메타데이터 추출 마이크로 벤치마크.
+
+저장된 HTML 예제(scripts/bench_fixtures)를 대상으로
+  - 기존 방식: 응답 전체를 받아 BeautifulSoup(html.parser)로 문서 전체를 파싱
+  - 스트리밍 방식: URLPreviewGenerator.extract_metadata_stream (</head> 또는 바이트 상한에서 중단)
+의 처리 시간, 최대 메모리 사용량, 실제로 읽은 바이트 수와 추출 결과를 비교합니다.
+
+사용법:
+    python scripts/benchmark_url_preview.py [--iterations 20] [--pad-kb 1024]
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+from urllib.parse import urljoin
+
+# 프로젝트 루트 디렉토리를 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from utils.url_utils import URLPreviewGenerator
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_fixtures')
+FIXTURE_URL = 'https://example.com/article/1'
+CHUNK_SIZE = 16 * 1024
+
+
+def legacy_extract(content, url, domain):
+    """변경 전 URLPreviewGenerator._extract_metadata와 동일한 로직 (비교 기준)"""
+    soup = BeautifulSoup(content, 'html.parser')
+    metadata = {'url': url, 'type': 'website', 'site_name': domain}
+    og_tags = {
+        'title': soup.find('meta', property='og:title'),
+        'description': soup.find('meta', property='og:description'),
+        'image': soup.find('meta', property='og:image'),
+        'site_name': soup.find('meta', property='og:site_name')
+    }
+    meta_tags = {
+        'title': soup.find('title'),
+        'description': soup.find('meta', attrs={'name': 'description'})
+    }
+    if og_tags['title'] and og_tags['title'].get('content'):
+        metadata['title'] = og_tags['title']['content']
+    elif meta_tags['title']:
+        metadata['title'] = meta_tags['title'].get_text().strip()
+    else:
+        metadata['title'] = domain
+    if og_tags['description'] and og_tags['description'].get('content'):
+        metadata['description'] = og_tags['description']['content']
+    elif meta_tags['description'] and meta_tags['description'].get('content'):
+        metadata['description'] = meta_tags['description']['content']
+    else:
+        first_p = soup.find('p')
+        metadata['description'] = first_p.get_text().strip()[:200] + '...' if first_p else ''
+    if og_tags['image'] and og_tags['image'].get('content'):
+        metadata['image_url'] = og_tags['image']['content']
+    else:
+        first_img = soup.find('img')
+        if first_img and first_img.get('src'):
+            img_src = first_img['src']
+            if not img_src.startswith('http'):
+                img_src = urljoin(url, img_src)
+            metadata['image_url'] = img_src
+    if og_tags['site_name'] and og_tags['site_name'].get('content'):
+        metadata['site_name'] = og_tags['site_name']['content']
+    return metadata
+
+
+def pad_document(content, pad_kb):
+    """큰 페이지를 흉내 내기 위해 </body> 앞에 본문 문단을 덧붙임"""
+    if pad_kb <= 0:
+        return content
+    filler = b'<div class="comment"><p>' + b'padding text ' * 20 + b'</p></div>\n'
+    padding = filler * (pad_kb * 1024 // len(filler) + 1)
+    index = content.rfind(b'</body>')
+    return content[:index] + padding + content[index:]
+
+
+def measure(func, iterations):
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = func()
+    elapsed = (time.perf_counter() - started) / iterations
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run(iterations, pad_kb):
+    generator = URLPreviewGenerator()
+    domain = generator._get_domain_name(FIXTURE_URL)
+
+    print(f"{'fixture':<22}{'size':>10}  {'legacy ms':>10}{'stream ms':>11}  {'legacy peak':>12}{'stream peak':>12}  {'read':>9}  same")
+    for name in sorted(os.listdir(FIXTURE_DIR)):
+        with open(os.path.join(FIXTURE_DIR, name), 'rb') as f:
+            content = pad_document(f.read(), pad_kb)
+
+        read_bytes = {'n': 0}
+
+        def chunks():
+            for start in range(0, len(content), CHUNK_SIZE):
+                read_bytes['n'] = start + CHUNK_SIZE
+                yield content[start:start + CHUNK_SIZE]
+
+        legacy, legacy_time, legacy_peak = measure(lambda: legacy_extract(content, FIXTURE_URL, domain), iterations)
+        stream, stream_time, stream_peak = measure(
+            lambda: generator.extract_metadata_stream(chunks(), FIXTURE_URL), iterations
+        )
+        same = 'yes' if legacy == stream else 'NO'
+        print(f"{name:<22}{len(content) // 1024:>8}KB  {legacy_time * 1000:>10.2f}{stream_time * 1000:>11.2f}"
+              f"  {legacy_peak // 1024:>10}KB{stream_peak // 1024:>10}KB  {min(read_bytes['n'], len(content)) // 1024:>7}KB  {same}")
+        if legacy != stream:
+            print(f"  legacy: {legacy}\n  stream: {stream}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='URL 미리보기 메타데이터 추출 벤치마크')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--pad-kb', type=int, default=1024, help='본문에 덧붙일 크기(KB), 큰 페이지 시뮬레이션용')
+    args = parser.parse_args()
+    run(args.iterations, args.pad_kb)
@@ -0,0 +1,44 @@
+import threading
+
+
+class BackgroundWorker:
+    """
+    요청 스레드 밖에서 작업 함수를 실행하는 단일 데몬 스레드.
+    interval(초)마다 주기적으로 실행되며, wake()를 호출하면 즉시 실행됩니다.
+    작업 함수가 참(True)을 반환하면 남은 작업이 있다는 뜻으로 보고 바로 다시 실행합니다.
+    """
+
+    def __init__(self, name, func, interval=60):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self._event = threading.Event()
+        self._thread = None
+        self._app = None
+
+    def start(self, app):
+        if self._thread is not None:
+            return
+        self._app = app
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._event.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            self._event.wait(self.interval)
+            self._event.clear()
+            has_more = True
+            while has_more:
+                with self._app.app_context():
+                    try:
+                        has_more = bool(self.func())
+                    except Exception as e:
+                        print(f"[{self.name}] 작업 오류: {e}")
+                        has_more = False
@@ -0,0 +1,100 @@
+import os
+import gzip
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from collections import namedtuple
+from utils.db_changelog import snapshot_seq
+
+# 'incremental': 기준 스냅샷 + 변경분 세그먼트, 'full': 매번 전체 스냅샷
+DB_BACKUP_MODE = os.environ.get('DB_BACKUP_MODE', 'incremental')
+DB_BASE_MAX_AGE = float(os.environ.get('DB_BACKUP_BASE_HOURS', 24)) * 3600  # 이 시간이 지나면 새 기준 스냅샷
+DB_MAX_SEGMENTS = int(os.environ.get('DB_BACKUP_MAX_SEGMENTS', 50))         # 세그먼트가 이만큼 쌓이면 새 기준 스냅샷
+
+CHUNK_SIZE = 1024 * 1024
+BACKUP_PAGES_PER_STEP = 1024  # 한 번에 복사할 페이지 수 (단계 사이에 다른 연결이 쓰기를 할 수 있음)
+
+# seq: 스냅샷에 포함된 마지막 변경 기록 번호 (증분 백업의 기준점)
+Snapshot = namedtuple('Snapshot', ['path', 'checksum', 'raw_size', 'compressed_size', 'seq'])
+
+
+def create_snapshot(db_path, snapshot_path):
+    """
+    SQLite 온라인 백업 API로 트랜잭션 일관성이 보장된 복사본을 만듭니다.
+    앱이 쓰는 중인 파일을 그대로 읽으면 페이지가 섞인 손상된 사본이 될 수 있기 때문입니다.
+    """
+    source = sqlite3.connect(db_path)
+    try:
+        target = sqlite3.connect(snapshot_path)
+        try:
+            source.backup(target, pages=BACKUP_PAGES_PER_STEP)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+def compress_file(src_path, dest_path):
+    """
+    파일을 청크 단위로 gzip 압축하면서 원본의 SHA-256을 함께 계산합니다.
+    같은 내용이면 압축 결과도 같도록 gzip 헤더의 시각은 0으로 고정합니다.
+    반환값: (sha256 hex, 원본 크기, 압축 크기)
+    """
+    digest = hashlib.sha256()
+    raw_size = 0
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as out:
+        with gzip.GzipFile(filename='', mode='wb', fileobj=out, mtime=0, compresslevel=6) as gz:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                raw_size += len(chunk)
+                gz.write(chunk)
+    return digest.hexdigest(), raw_size, os.path.getsize(dest_path)
+
+
+def decompress_file(src_path, dest_path):
+    with gzip.open(src_path, 'rb') as gz, open(dest_path, 'wb') as out:
+        shutil.copyfileobj(gz, out, CHUNK_SIZE)
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_checksum(db_path):
+    """DB 스냅샷의 SHA-256 (드라이브에 올린 기준 스냅샷과 같은 내용인지 비교용)"""
+    with temp_path(os.path.dirname(os.path.abspath(db_path)), '.snapshot') as raw_path:
+        create_snapshot(db_path, raw_path)
+        return file_checksum(raw_path)
+
+
+@contextmanager
+def temp_path(directory, suffix):
+    """directory 안에 임시 파일 경로를 만들고, 블록이 끝나면 남은 파일을 지움"""
+    fd, path = tempfile.mkstemp(dir=directory, suffix=suffix)
+    os.close(fd)
+    try:
+        yield path
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+@contextmanager
+def compressed_snapshot(db_path):
+    """DB의 일관된 스냅샷을 gzip으로 압축한 임시 파일 (블록이 끝나면 삭제)"""
+    directory = os.path.dirname(os.path.abspath(db_path))
+    with temp_path(directory, '.snapshot') as raw_path, temp_path(directory, '.snapshot.gz') as gz_path:
+        create_snapshot(db_path, raw_path)
+        seq = snapshot_seq(raw_path)
+        checksum, raw_size, compressed_size = compress_file(raw_path, gz_path)
+        os.remove(raw_path)
+        yield Snapshot(gz_path, checksum, raw_size, compressed_size, seq)
@@ -0,0 +1,168 @@
+import json
+import gzip
+import sqlite3
+from sqlalchemy import text
+
+CHANGELOG_TABLE = '_changelog'
+TRIGGER_PREFIX = '_changelog_'
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _trigger_sql(table, columns):
+    """테이블 하나에 대한 INSERT/UPDATE/DELETE 변경 기록 트리거"""
+    row_json = 'json_object(' + ', '.join(f"'{col}', NEW.{_quote(col)}" for col in columns) + ')'
+    quoted = _quote(table)
+    return [
+        f"CREATE TRIGGER {TRIGGER_PREFIX}{table}_ins AFTER INSERT ON {quoted} BEGIN "
+        f"INSERT INTO {CHANGELOG_TABLE} (tbl, op, row_id, data) VALUES ('{table}', 'I', NEW.rowid, {row_json}); END",
+        f"CREATE TRIGGER {TRIGGER_PREFIX}{table}_upd AFTER UPDATE ON {quoted} BEGIN "
+        f"INSERT INTO {CHANGELOG_TABLE} (tbl, op, row_id, data) VALUES ('{table}', 'U', NEW.rowid, {row_json}); END",
+        f"CREATE TRIGGER {TRIGGER_PREFIX}{table}_del AFTER DELETE ON {quoted} BEGIN "
+        f"INSERT INTO {CHANGELOG_TABLE} (tbl, op, row_id, data) VALUES ('{table}', 'D', OLD.rowid, NULL); END",
+    ]
+
+
+def install_changelog(db):
+    """
+    모든 모델 테이블에 변경 기록 트리거를 설치합니다 (SQLite 전용, 시작할 때마다 호출).
+    각 행의 최종 상태를 JSON으로 _changelog에 남겨 두면, 드라이브에는 DB 전체 대신
+    마지막 업로드 이후의 변경분만 작은 세그먼트로 올릴 수 있습니다.
+    테이블 구조가 바뀌어 트리거가 달라지면 'S' 항목을 남겨 다음 동기화 때 새 기준 스냅샷을 만들게 합니다.
+    """
+    engine = db.engine
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {CHANGELOG_TABLE} ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, tbl TEXT NOT NULL, op TEXT NOT NULL,"
+            " row_id INTEGER, data TEXT)"
+        ))
+        wanted = {}
+        for table in db.metadata.sorted_tables:
+            columns = [row[1] for row in conn.execute(text(f"PRAGMA table_info({_quote(table.name)})"))]
+            for sql in _trigger_sql(table.name, columns):
+                wanted[sql.split()[2]] = sql
+        existing = dict(conn.execute(text(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE :prefix"
+        ), {'prefix': TRIGGER_PREFIX + '%'}).fetchall())
+        if existing == wanted:
+            return False
+        for name in existing:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {_quote(name)}"))
+        for sql in wanted.values():
+            conn.execute(text(sql))
+        conn.execute(text(f"INSERT INTO {CHANGELOG_TABLE} (tbl, op) VALUES ('', 'S')"))
+    print(f"[Backup] 변경 기록 트리거 {len(wanted)}개 설치")
+    return True
+
+
+def has_changelog(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return _table_exists(conn, CHANGELOG_TABLE)
+    finally:
+        conn.close()
+
+
+def snapshot_seq(db_path):
+    """DB(또는 스냅샷)에 기록된 마지막 변경 번호"""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (CHANGELOG_TABLE,)).fetchone()
+        return row[0] if row else 0
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
+
+
+def read_changes(db_path, after_seq):
+    """after_seq 이후의 변경 목록 [(seq, tbl, op, row_id, data), ...]"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            f"SELECT seq, tbl, op, row_id, data FROM {CHANGELOG_TABLE} WHERE seq > ? ORDER BY seq", (after_seq,)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+
+
+def prune_changes(db_path, upto_seq):
+    """기준 스냅샷에 이미 포함된 변경 기록 삭제"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            conn.execute(f"DELETE FROM {CHANGELOG_TABLE} WHERE seq <= ?", (upto_seq,))
+    finally:
+        conn.close()
+
+
+def write_segment(changes, path):
+    """변경 목록을 gzip 압축 JSON Lines 세그먼트 파일로 저장"""
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for seq, tbl, op, row_id, data in changes:
+            f.write(json.dumps({'seq': seq, 'tbl': tbl, 'op': op, 'id': row_id, 'data': data}, ensure_ascii=False))
+            f.write('\n')
+
+
+def apply_segments(db_path, segment_paths, after_seq):
+    """
+    기준 스냅샷으로 복원한 DB에 세그먼트를 순서대로 적용합니다.
+    변경 번호가 이미 적용한 것 이하인 항목은 건너뛰므로 세그먼트 범위가 겹쳐도 안전합니다.
+    반환값: 마지막으로 적용한 변경 번호
+    """
+    conn = sqlite3.connect(db_path)
+    applied = after_seq
+    try:
+        if not _table_exists(conn, CHANGELOG_TABLE):
+            # 변경 기록을 쓰기 전에 만들어진 기준 스냅샷 (적용할 세그먼트가 있을 수 없음)
+            return applied
+        with conn:
+            # 복원 중의 쓰기가 다시 기록되지 않도록 트리거 제거 (앱 시작 시 install_changelog가 다시 설치)
+            for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE ?", (TRIGGER_PREFIX + '%',)
+            ).fetchall():
+                conn.execute(f"DROP TRIGGER {_quote(name)}")
+            for path in segment_paths:
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        change = json.loads(line)
+                        if change['seq'] <= applied:
+                            continue
+                        _apply_change(conn, change)
+                        applied = change['seq']
+            # 이후 새 변경 번호가 드라이브에 올라간 번호와 겹치지 않도록 시퀀스를 이어감
+            conn.execute(f"DELETE FROM {CHANGELOG_TABLE}")
+            updated = conn.execute(
+                "UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = ?", (applied, CHANGELOG_TABLE)
+            ).rowcount
+            if not updated:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (CHANGELOG_TABLE, applied))
+            if applied != after_seq and _table_exists(conn, 'post_fts'):
+                # 전문 검색 색인은 트리거 대상이 아니므로 비워 두면 앱 시작 시 다시 색인됨
+                conn.execute("DELETE FROM post_fts")
+    finally:
+        conn.close()
+    return applied
+
+
+def _table_exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def _apply_change(conn, change):
+    table = _quote(change['tbl'])
+    if change['op'] == 'D':
+        conn.execute(f"DELETE FROM {table} WHERE rowid = ?", (change['id'],))
+    elif change['op'] in ('I', 'U'):
+        data = json.loads(change['data'])
+        columns = list(data)
+        conn.execute(
+            f"INSERT OR REPLACE INTO {table} (rowid, {', '.join(_quote(c) for c in columns)}) "
+            f"VALUES (?, {', '.join('?' for _ in columns)})",
+            [change['id']] + [data[c] for c in columns]
+        )
@@ -0,0 +1,141 @@
+import os
+import time
+import datetime
+import threading
+import httplib2
+import google_auth_httplib2
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+from dotenv import load_dotenv
+
+DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive.file', 'https://www.googleapis.com/auth/drive']
+TOKEN_URI = 'https://oauth2.googleapis.com/token'
+TOKEN_REFRESH_MARGIN = 300   # 액세스 토큰 만료 이 시간(초) 전에 미리 갱신
+HTTP_TIMEOUT = 60
+
+
+class DriveClientFactory:
+    """
+    프로세스 전체가 공유하는 구글 드라이브 클라이언트.
+    디스커버리 문서(패키지에 포함된 정적 문서)는 처음 한 번만 읽어 서비스 객체를 만들고,
+    OAuth 자격 증명도 하나를 공유하며 만료 전에 잠금 안에서 한 번만 갱신합니다.
+    httplib2 연결은 스레드 안전하지 않으므로 요청마다 현재 스레드의 연결을 붙여 실행합니다.
+    """
+
+    def __init__(self, token_uri=TOKEN_URI, refresh_margin=TOKEN_REFRESH_MARGIN, timeout=HTTP_TIMEOUT, client_options=None):
+        self.token_uri = token_uri
+        self.client_options = client_options
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self._service = None
+        self._credentials = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._local = threading.local()
+        self._env_loaded = False
+        self.metrics = {
+            'builds': 0, 'build_seconds': 0.0,
+            'refreshes': 0, 'refresh_seconds': 0.0, 'refresh_failures': 0,
+            'requests': 0, 'thread_connections': 0
+        }
+
+    @property
+    def service(self):
+        """공유 드라이브 서비스 (인증 정보가 없으면 None)"""
+        if self._service is None:
+            with self._lock:
+                if self._service is None:
+                    self._service = self._build()
+        return self._service
+
+    def _build(self):
+        if not self._env_loaded:
+            load_dotenv()
+            self._env_loaded = True
+        client_id = os.environ.get('GOOGLE_CLIENT_ID')
+        client_secret = os.environ.get('GOOGLE_CLIENT_SECRET')
+        refresh_token = os.environ.get('GOOGLE_REFRESH_TOKEN')
+
+        if not all([client_id, client_secret, refresh_token]):
+            print("오류: 구글 드라이브 인증에 필요한 환경 변수가 설정되지 않았습니다.")
+            return None
+
+        started = time.perf_counter()
+        try:
+            self._credentials = Credentials(
+                None,
+                refresh_token=refresh_token,
+                token_uri=self.token_uri,
+                client_id=client_id,
+                client_secret=client_secret,
+                scopes=DRIVE_SCOPES
+            )
+            self.credentials()
+            service = build(
+                'drive', 'v3', credentials=self._credentials,
+                requestBuilder=self._build_request, static_discovery=True, cache_discovery=False,
+                client_options=self.client_options
+            )
+        except Exception as e:
+            print(f"구글 드라이브 인증 오류: {e}")
+            self._credentials = None
+            return None
+        self.metrics['builds'] += 1
+        self.metrics['build_seconds'] += time.perf_counter() - started
+        return service
+
+    def credentials(self):
+        """유효한 자격 증명 반환. 만료가 가까우면 한 스레드만 갱신하고 나머지는 그 결과를 사용"""
+        creds = self._credentials
+        if creds is None:
+            return None
+        if not self._needs_refresh(creds):
+            return creds
+        with self._refresh_lock:
+            if self._needs_refresh(creds):
+                started = time.perf_counter()
+                try:
+                    creds.refresh(Request())
+                except Exception:
+                    self.metrics['refresh_failures'] += 1
+                    raise
+                self.metrics['refreshes'] += 1
+                self.metrics['refresh_seconds'] += time.perf_counter() - started
+        return creds
+
+    def _needs_refresh(self, creds):
+        if not creds.token or not creds.expiry:
+            return True
+        remaining = creds.expiry - datetime.datetime.utcnow()
+        return remaining.total_seconds() < self.refresh_margin
+
+    def _thread_http(self):
+        # fork된 워커가 부모 프로세스의 연결을 이어 쓰지 않도록 프로세스 ID도 함께 확인
+        cached = getattr(self._local, 'http', None)
+        if cached is None or cached[0] != os.getpid():
+            cached = (os.getpid(), httplib2.Http(timeout=self.timeout))
+            self._local.http = cached
+            self.metrics['thread_connections'] += 1
+        return cached[1]
+
+    def _build_request(self, http, *args, **kwargs):
+        """googleapiclient의 requestBuilder: 공유 자격 증명 + 현재 스레드의 연결로 요청 생성"""
+        self.metrics['requests'] += 1
+        authed = google_auth_httplib2.AuthorizedHttp(self.credentials(), http=self._thread_http())
+        return HttpRequest(authed, *args, **kwargs)
+
+    def stats(self):
+        stats = dict(self.metrics)
+        stats['build_seconds'] = round(stats['build_seconds'], 4)
+        stats['refresh_seconds'] = round(stats['refresh_seconds'], 4)
+        creds = self._credentials
+        stats['token_expires_in'] = (
+            round((creds.expiry - datetime.datetime.utcnow()).total_seconds())
+            if creds is not None and creds.expiry else None
+        )
+        return stats
+
+
+drive_client = DriveClientFactory()
@@ -0,0 +1,166 @@
+import os
+import uuid
+import random
+from datetime import datetime, timedelta, timezone
+from utils.background import BackgroundWorker
+from utils.google_drive_utils import drive_manager, LEGACY_DB_NAME
+from utils.time_utils import get_korean_time_for_db
+
+DRIVE_GC_BATCH_SIZE = 100                 # 배치 요청 하나로 삭제할 최대 파일 수
+DRIVE_GC_MAX_ATTEMPTS = int(os.environ.get('DRIVE_GC_MAX_ATTEMPTS', 8))   # 이 횟수만큼 실패하면 'failed'로 보관
+RETRY_BASE_DELAY = 60                     # 첫 재시도까지 대기(초), 이후 2배씩 증가
+RETRY_MAX_DELAY = 6 * 3600                # 재시도 간격 상한(초)
+CLAIM_TIMEOUT = timedelta(minutes=10)     # 워커가 삭제 중 종료되어 남은 'deleting' 작업을 다시 가져갈 시간
+FAILED_RETENTION = timedelta(days=30)     # 영구 실패한 작업 보관 기간
+
+DRIVE_GC_RECONCILE_HOURS = float(os.environ.get('DRIVE_GC_RECONCILE_HOURS', 24))  # 고아 파일 점검 주기 (0이면 끔)
+ORPHAN_GRACE = timedelta(hours=24)        # 업로드 후 게시글 저장 전인 파일을 지우지 않도록 이 시간이 지난 파일만 대상
+ORPHAN_SAFETY_RATIO = 0.5                 # 폴더의 절반 이상이 고아로 보이면 DB 이상으로 보고 중단
+ORPHAN_SAFETY_MIN = 20
+
+
+def enqueue_drive_deletions(file_ids, reason='post'):
+    """
+    삭제할 드라이브 파일을 대기열에 추가 (commit은 호출한 쪽에서, 이후 drive_gc_worker.wake()).
+    게시글 삭제와 같은 트랜잭션으로 기록되므로 응답은 바로 반환되고, 파일 삭제가 누락되지 않습니다.
+    """
+    from extensions import db
+    from models import DriveDeletion
+
+    file_ids = [file_id for file_id in dict.fromkeys(file_ids) if file_id]
+    for file_id in file_ids:
+        db.session.add(DriveDeletion(file_id=file_id, reason=reason))
+    return len(file_ids)
+
+
+def retry_delay(attempts):
+    """지수 백오프 + 지터: 60초, 120초, 240초 ... (최대 6시간)"""
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** max(attempts - 1, 0)))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _claim_batch(db, DriveDeletion):
+    """삭제할 작업을 배치 단위로 선점 (여러 워커가 동시에 실행해도 같은 작업을 두 번 가져가지 않음)"""
+    now = get_korean_time_for_db()
+    claimable = db.or_(
+        db.and_(DriveDeletion.status == 'pending', DriveDeletion.next_attempt_at <= now),
+        db.and_(DriveDeletion.status == 'deleting', DriveDeletion.claimed_at <= now - CLAIM_TIMEOUT)
+    )
+    due_ids = db.session.query(DriveDeletion.id).filter(claimable).order_by(DriveDeletion.next_attempt_at).limit(DRIVE_GC_BATCH_SIZE)
+    token = uuid.uuid4().hex
+    DriveDeletion.query.filter(DriveDeletion.id.in_(due_ids.scalar_subquery()), claimable).update(
+        {'status': 'deleting', 'claim_token': token, 'claimed_at': now}, synchronize_session=False
+    )
+    db.session.commit()
+    return DriveDeletion.query.filter_by(claim_token=token).all()
+
+
+def process_drive_deletions():
+    """
+    대기열의 파일을 드라이브 배치 요청으로 삭제합니다.
+    성공(이미 없는 파일 포함)한 작업은 지우고, 실패한 작업은 백오프 후 재시도합니다.
+    """
+    from extensions import db
+    from models import DriveDeletion, PostAttachment
+
+    if not drive_manager.service:
+        return False
+    jobs = _claim_batch(db, DriveDeletion)
+    if not jobs:
+        _purge_failed(db, DriveDeletion)
+        return False
+
+    # 그 사이 다른 게시글이 같은 파일을 쓰게 되었다면 삭제하지 않음
+    file_ids = list({job.file_id for job in jobs})
+    referenced = {row.file_id for row in db.session.query(PostAttachment.file_id).filter(PostAttachment.file_id.in_(file_ids))}
+    results = drive_manager.delete_files([file_id for file_id in file_ids if file_id not in referenced])
+
+    now = get_korean_time_for_db()
+    done, failed = [], 0
+    for job in jobs:
+        if job.file_id in referenced or results.get(job.file_id):
+            done.append(job.id)
+            continue
+        job.attempts += 1
+        job.last_error = '드라이브 파일 삭제 실패'
+        job.claim_token = None
+        if job.attempts < DRIVE_GC_MAX_ATTEMPTS:
+            job.status = 'pending'
+            job.next_attempt_at = now + retry_delay(job.attempts)
+        else:
+            job.status = 'failed'
+            failed += 1
+            print(f"[DriveGC] 파일 삭제 실패 ({job.file_id}, {job.attempts}회 시도)")
+    if done:
+        DriveDeletion.query.filter(DriveDeletion.id.in_(done)).delete(synchronize_session=False)
+    db.session.commit()
+
+    print(f"[DriveGC] 대기열 {len(jobs)}건 처리: 삭제 {len(done)}건, 재시도 {len(jobs) - len(done) - failed}건")
+    return len(jobs) == DRIVE_GC_BATCH_SIZE
+
+
+def _purge_failed(db, DriveDeletion):
+    DriveDeletion.query.filter(
+        DriveDeletion.status == 'failed',
+        DriveDeletion.created_at <= get_korean_time_for_db() - FAILED_RETENTION
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def reconcile_drive_files():
+    """
+    드라이브 폴더를 페이지 단위로 훑어 어떤 게시글에서도 참조하지 않는 첨부 파일을 삭제 대기열에 추가.
+    DB 백업 파일(sns.db*)과 업로드 직후(ORPHAN_GRACE 이내)인 파일은 제외하며,
+    DB가 비어 있거나 복구가 잘못된 것처럼 고아 파일이 지나치게 많으면 아무것도 지우지 않습니다.
+    반환값: 대기열에 추가한 파일 수
+    """
+    from extensions import db
+    from models import DriveDeletion, PostAttachment
+
+    if not drive_manager.service:
+        return 0
+    referenced = {row.file_id for row in db.session.query(PostAttachment.file_id)}
+    queued = {row.file_id for row in db.session.query(DriveDeletion.file_id)}
+    cutoff = datetime.now(timezone.utc) - ORPHAN_GRACE
+
+    candidates, orphans = 0, []
+    for file_info in drive_manager.iter_folder_files(fields='id, name, createdTime'):
+        if file_info['name'].startswith(LEGACY_DB_NAME):
+            continue
+        candidates += 1
+        if file_info['id'] in referenced or file_info['id'] in queued:
+            continue
+        created = datetime.fromisoformat(file_info['createdTime'].replace('Z', '+00:00'))
+        if created < cutoff:
+            orphans.append(file_info['id'])
+
+    if not orphans:
+        return 0
+    if not referenced:
+        # 첨부 파일이 하나도 없는 DB(복구 실패, 새 DB 등)를 기준으로는 아무것도 지우지 않음
+        print(f"[DriveGC] DB에 첨부 파일 기록이 없어 고아 파일 {len(orphans)}개 정리를 건너뜁니다. DB 상태를 확인하세요.")
+        return 0
+    if len(orphans) > ORPHAN_SAFETY_MIN and len(orphans) > candidates * ORPHAN_SAFETY_RATIO:
+        print(f"[DriveGC] 고아 파일이 너무 많아({len(orphans)}/{candidates}) 정리를 건너뜁니다. DB 상태를 확인하세요.")
+        return 0
+    enqueue_drive_deletions(orphans, reason='orphan')
+    db.session.commit()
+    drive_gc_worker.wake()
+    print(f"[DriveGC] 고아 파일 {len(orphans)}개를 삭제 대기열에 추가")
+    return len(orphans)
+
+
+def drive_gc_stats():
+    """삭제 대기열 깊이(상태별 개수, 가장 오래된 대기 작업의 나이)"""
+    from extensions import db
+    from models import DriveDeletion
+
+    depth = dict(db.session.query(DriveDeletion.status, db.func.count(DriveDeletion.id)).group_by(DriveDeletion.status).all())
+    oldest = db.session.query(db.func.min(DriveDeletion.created_at)).filter(DriveDeletion.status.in_(('pending', 'deleting'))).scalar()
+    return {
+        'queue_depth': {status: depth.get(status, 0) for status in ('pending', 'deleting', 'failed')},
+        'oldest_pending_age': round((get_korean_time_for_db() - oldest).total_seconds(), 1) if oldest else None,
+    }
+
+
+drive_gc_worker = BackgroundWorker('drive-gc', process_drive_deletions, interval=60)
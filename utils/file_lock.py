@@ -0,0 +1,43 @@
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows (exe 배포)
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path, blocking=True):
+    """
+    같은 호스트의 여러 프로세스(gunicorn 워커 등) 사이에서 쓰는 배타적 파일 잠금.
+    잠금을 얻을 때까지 기다리며, 프로세스가 종료되면 운영체제가 자동으로 해제합니다.
+    blocking=False이면 기다리지 않고, 다른 프로세스가 잡고 있을 때 False를 넘겨줍니다 (얻으면 True).
+    """
+    with open(path, 'a+') as f:
+        if fcntl:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        else:
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if not blocking:
+                        yield False
+                        return
+                    time.sleep(0.1)
+        try:
+            yield True
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,65 @@
+import os
+import threading
+from collections import OrderedDict
+from flask import render_template
+from markupsafe import Markup
+
+# 정적 카드 HTML 안에서 보는 사람별 컨트롤(삭제 버튼 등)이 들어갈 자리
+VIEWER_CONTROLS_SLOT = '<!--post-card-viewer-controls-->'
+
+
+class FragmentCache:
+    """버전 키를 함께 저장하는 LRU 방식의 렌더링 조각 캐시 (프로세스 내 공유)"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+post_card_cache = FragmentCache(max_entries=int(os.environ.get('POST_CARD_CACHE_SIZE', 1000)))
+
+
+def post_card_html(post, viewer_controls=''):
+    """
+    게시글 카드 중 보는 사람과 무관한 부분은 캐시에서 꺼내고,
+    보는 사람별 컨트롤만 자리에 끼워 넣어 반환합니다.
+    게시글 수정(updated_at)이나 댓글 수 변경 시 버전이 달라져 자동으로 다시 렌더링됩니다.
+    """
+    version = (post.updated_at, post.comment_count)
+    html = post_card_cache.get(post.id, version)
+    if html is None:
+        html = render_template('partials/_post_card_static.html', post=post,
+                               viewer_controls=Markup(VIEWER_CONTROLS_SLOT))
+        post_card_cache.set(post.id, version, html)
+    return Markup(html.replace(VIEWER_CONTROLS_SLOT, str(viewer_controls), 1))
@@ -1,12 +1,30 @@
 import os
+import re
 import json
 import io
-import threading
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
-from dotenv import load_dotenv
+import time
+import tempfile
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from utils.http_client import http_client
+from utils.drive_client import drive_client
+from utils.shared_cache import SharedTTLCache, MISSING
+from utils.db_backup import compressed_snapshot, snapshot_checksum, decompress_file, temp_path, DB_BACKUP_MODE, DB_BASE_MAX_AGE, DB_MAX_SEGMENTS
+from utils.db_changelog import has_changelog, snapshot_seq, read_changes, prune_changes, write_segment, apply_segments
+from utils.file_lock import file_lock
+
+# DB 백업 파일 이름 (gzip 압축 기준 스냅샷) / 압축 이전 버전이 올리던 원본 파일 이름
+DB_BACKUP_NAME = 'sns.db.gz'
+LEGACY_DB_NAME = 'sns.db'
+# 증분 백업 세그먼트 파일 이름: sns.db.seg-<첫 변경 번호>-<마지막 변경 번호>.gz
+DB_SEGMENT_PREFIX = 'sns.db.seg-'
+DB_SEGMENT_PATTERN = re.compile(r'^sns\.db\.seg-(\d+)-(\d+)\.gz$')
+# 배치 요청 하나에 담을 수 있는 최대 요청 수 (드라이브 API 제한)
+BATCH_LIMIT = 100
+# 다른 워커가 DB를 동기화하는 중이라 이번 동기화를 건너뛴 경우 sync_database의 반환값
+SYNC_BUSY = 'busy'
+# 이름 → 파일 ID 캐시 유지 시간(초). 파일이 삭제되면 조회 시 404로 알 수 있으므로 길게 보관
+FILE_ID_TTL = 7 * 24 * 3600
 
 class GoogleDriveManager:
     def __init__(self):
@@ -14,8 +32,13 @@ class GoogleDriveManager:
         # 구글 드라이브 폴더 ID는 공개되어도 안전하므로 기본값 유지
         self.default_folder_id = os.environ.get('GOOGLE_DRIVE_FOLDER_ID', '1O50x9kbr5BliCayYTzKVLJ6NsH1uTFk7')
         
-        # 쓰레드별 서비스 인스턴스 관리를 위한 로컬 변수
-        self._local = threading.local()
+        # 마지막으로 업로드한 DB 스냅샷의 체크섬 (같으면 업로드 생략)
+        self._last_synced_checksum = None
+        self._last_synced_file_id = None
+        # 증분 백업 상태 (기준 스냅샷 ID/변경 번호/시각, 마지막으로 올린 변경 번호, 세그먼트 수)
+        self._backup_state = None
+        # sns.db.gz처럼 이름으로 찾는 파일의 ID (모든 워커가 공유, 목록 검색 대신 ID로 바로 조회)
+        self._file_ids = SharedTTLCache('drive_file_id', max_entries=100)
 
     @property
     def folder_id(self):
@@ -24,65 +47,56 @@ class GoogleDriveManager:
 
     @property
     def service(self):
-        """쓰레드별로 독립적인 구글 드라이브 서비스 인스턴스를 반환"""
-        if not hasattr(self._local, 'instance') or self._local.instance is None:
-            self._local.instance = self._authenticate()
-        return self._local.instance
-
-    def _authenticate(self):
-        """OAuth2 Refresh Token을 사용하여 사용자 계정 인증 수행 (실시간 환경 변수 로드)"""
-        # 매번 환경 변수를 새로 확인하여 load_dotenv() 이후의 값을 반영함
-        load_dotenv()
-        client_id = os.environ.get('GOOGLE_CLIENT_ID')
-        client_secret = os.environ.get('GOOGLE_CLIENT_SECRET')
-        refresh_token = os.environ.get('GOOGLE_REFRESH_TOKEN')
-
-        if not all([client_id, client_secret, refresh_token]):
-            print("오류: 구글 드라이브 인증에 필요한 환경 변수가 설정되지 않았습니다.")
-            return None
-
-        try:
-            creds = Credentials(
-                None,
-                refresh_token=refresh_token,
-                token_uri="https://oauth2.googleapis.com/token",
-                client_id=client_id,
-                client_secret=client_secret,
-                scopes=['https://www.googleapis.com/auth/drive.file', 'https://www.googleapis.com/auth/drive']
-            )
-            
-            # 토큰 만료 시 갱신
-            if creds and (creds.expired or not creds.valid):
-                creds.refresh(Request())
-                
-            return build('drive', 'v3', credentials=creds)
-        except Exception as e:
-            print(f"구글 드라이브 인증 오류: {e}")
-            return None
+        """프로세스 전체가 공유하는 구글 드라이브 서비스 인스턴스를 반환 (인증 정보가 없으면 None)"""
+        return drive_client.service
 
-    def find_file_id(self, filename):
-        """이름으로 파일 ID 찾기"""
+    def find_file(self, filename, fields='id, name'):
+        """
+        이름으로 파일 정보(dict) 찾기.
+        한 번 찾은 파일은 ID를 캐시해 두고 다음부터는 목록 검색 대신 files.get으로 바로 조회합니다.
+        (목록 검색은 색인이 늦게 반영될 수 있어, 방금 만든 파일을 못 찾고 중복 생성하는 일도 막아 줍니다)
+        """
         if not self.service:
             return None
+        cache_key = f'{self.folder_id}/{filename}'
         try:
+            file_id = self._file_ids.get(cache_key)
+            if file_id is not MISSING:
+                try:
+                    file_info = self.service.files().get(fileId=file_id, fields=f'{fields}, trashed').execute()
+                    if not file_info.pop('trashed', False):
+                        return file_info
+                except HttpError as e:
+                    if e.resp.status != 404:
+                        raise
+                self._file_ids.delete(cache_key)
+
             query = f"name = '{filename}' and '{self.folder_id}' in parents and trashed = false"
-            results = self.service.files().list(q=query, fields="files(id, name)").execute()
+            results = self.service.files().list(q=query, fields=f"files({fields})").execute()
             files = results.get('files', [])
-            return files[0].get('id') if files else None
+            if files:
+                self.remember_file_id(filename, files[0]['id'])
+            return files[0] if files else None
         except Exception as e:
             print(f"파일 검색 오류 ({filename}): {e}")
             return None
 
+    def remember_file_id(self, filename, file_id):
+        self._file_ids.set(f'{self.folder_id}/{filename}', file_id, FILE_ID_TTL)
+
+    def find_file_id(self, filename):
+        """이름으로 파일 ID 찾기"""
+        file_info = self.find_file(filename)
+        return file_info.get('id') if file_info else None
+
     def create_upload_session(self, filename, mimetype, origin=None):
         """브라우저 직접 업로드를 위한 구글 드라이브 세션 URI 생성 (CORS 지원)"""
         if not self.service:
             return None
         
         try:
-            # 토큰 갱신 확인
-            creds = self.service._http.credentials
-            if creds.expired or not creds.valid:
-                creds.refresh(Request())
+            # 공유 자격 증명 사용 (만료가 가까우면 drive_client가 한 번만 갱신)
+            creds = drive_client.credentials()
 
             url = "https://www.googleapis.com/upload/drive/v3/files?uploadType=resumable"
             headers = {
@@ -100,8 +114,7 @@ class GoogleDriveManager:
                 'parents': [self.folder_id]
             }
             
-            import requests
-            response = requests.post(url, headers=headers, json=metadata)
+            response = http_client.post(url, headers=headers, json=metadata)
             if response.status_code == 200:
                 return response.headers.get('Location')
             else:
@@ -113,95 +126,442 @@ class GoogleDriveManager:
 
     def complete_upload(self, file_id):
         """업로드 완료 후 파일 권한 설정 및 정보 반환"""
-        if not self.service:
-            return None
-            
-        try:
+        return self.complete_uploads([file_id]).get(file_id)
+
+    def complete_uploads(self, file_ids):
+        """
+        업로드가 끝난 여러 파일의 공개 권한 설정과 정보 조회를 배치 요청 한 번으로 처리.
+        반환값: {file_id: 파일 정보 또는 None(실패)}
+        """
+        if not self.service or not file_ids:
+            return {}
+        file_ids = list(dict.fromkeys(file_ids))
+        requests = []
+        for file_id in file_ids:
             # 파일을 '링크가 있는 모든 사용자에게 공개'로 설정
-            self.service.permissions().create(
+            requests.append((f'perm:{file_id}', self.service.permissions().create(
                 fileId=file_id,
                 body={'type': 'anyone', 'role': 'reader'}
-            ).execute()
-            
+            )))
             # 최신 정보 가져오기
-            file_info = self.service.files().get(
+            requests.append((f'info:{file_id}', self.service.files().get(
                 fileId=file_id,
                 fields='id, name, webViewLink, webContentLink, thumbnailLink, mimeType, size'
-            ).execute()
-            
-            return file_info
-        except Exception as e:
-            print(f"업로드 완료 처리 오류 ({file_id}): {e}")
-            return None
+            )))
+        results = self.execute_batch(requests)
+
+        completed = {}
+        for file_id in file_ids:
+            errors = [results[key][1] for key in (f'perm:{file_id}', f'info:{file_id}') if results[key][1] is not None]
+            if errors:
+                print(f"업로드 완료 처리 오류 ({file_id}): {errors[0]}")
+                completed[file_id] = None
+            else:
+                completed[file_id] = results[f'info:{file_id}'][0]
+        return completed
 
-    def sync_database(self, local_db_path, filename='sns.db'):
-        """로컬 DB 파일을 드라이브로 동기화 (업데이트 또는 생성)"""
+    def execute_batch(self, requests):
+        """
+        드라이브 배치 HTTP 엔드포인트로 여러 요청을 한 번에 실행 (최대 BATCH_LIMIT개씩 나누어 전송).
+        requests: [(요청 ID, HttpRequest), ...]
+        반환값: {요청 ID: (응답, 예외)} — 요청별 실패는 예외로 담기고 전체를 중단하지 않습니다.
+        """
+        results = {}
+
+        def on_response(request_id, response, exception):
+            results[request_id] = (response, exception)
+
+        for start in range(0, len(requests), BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for request_id, http_request in requests[start:start + BATCH_LIMIT]:
+                batch.add(http_request, request_id=request_id)
+            try:
+                batch.execute()
+            except Exception as e:
+                # 배치 전체가 실패한 경우 응답을 받지 못한 요청은 모두 같은 오류로 처리
+                for request_id, _ in requests[start:start + BATCH_LIMIT]:
+                    results.setdefault(request_id, (None, e))
+        return results
+
+    @staticmethod
+    def _is_not_found(exception):
+        return getattr(getattr(exception, 'resp', None), 'status', None) == 404
+
+    def sync_database(self, local_db_path, filename=DB_BACKUP_NAME):
+        """
+        로컬 DB를 드라이브로 동기화.
+        증분 모드에서는 마지막 업로드 이후의 변경분만 작은 세그먼트로 올리고,
+        세그먼트가 많이 쌓였거나 기준 스냅샷이 오래되었거나 테이블 구조가 바뀌었을 때만 전체 스냅샷을 올립니다.
+
+        같은 DB를 쓰는 여러 gunicorn 워커가 동시에 올리지 않도록 파일 잠금(sns.db.sync.lock) 아래에서 실행하며,
+        다른 워커가 동기화 중이면 기다리지 않고 SYNC_BUSY를 반환합니다.
+        백업 상태(마지막으로 올린 변경 번호 등)도 워커마다 따로 두지 않고 sns.db.sync.json에서 읽고 저장합니다.
+        """
         if not self.service:
             return None
-        
+
+        with file_lock(local_db_path + '.sync.lock', blocking=False) as acquired:
+            if not acquired:
+                print(f"[Sync] 다른 워커가 DB를 동기화하는 중이므로 건너뜀")
+                return SYNC_BUSY
+            state_path = local_db_path + '.sync.json'
+            self._read_sync_state(state_path)
+            try:
+                if DB_BACKUP_MODE == 'incremental' and has_changelog(local_db_path):
+                    return self._sync_incremental(local_db_path, filename)
+                return self._upload_base(local_db_path, filename)
+            except Exception as e:
+                print(f"DB 동기화 오류: {e}")
+                return None
+            finally:
+                self._write_sync_state(state_path)
+
+    def _read_sync_state(self, state_path):
+        """다른 워커가 마지막으로 기록한 백업 상태를 불러옴 (없으면 드라이브에서 다시 복원하도록 비워 둠)"""
         try:
-            file_id = self.find_file_id(filename)
-            media = MediaIoBaseUpload(local_db_path, mimetype='application/x-sqlite3', resumable=True)
-            
-            if file_id:
+            with open(state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        self._backup_state = state.get('backup')
+        self._last_synced_checksum = state.get('checksum')
+        self._last_synced_file_id = state.get('file_id')
+
+    def _write_sync_state(self, state_path):
+        state = {'backup': self._backup_state, 'checksum': self._last_synced_checksum, 'file_id': self._last_synced_file_id}
+        tmp_path = f'{state_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, state_path)
+        except OSError as e:
+            print(f"[Sync] 백업 상태 저장 오류: {e}")
+
+    def _upload_base(self, local_db_path, filename):
+        """
+        기준 스냅샷 업로드.
+        SQLite 백업 API로 일관된 스냅샷을 만들어 gzip으로 압축해 올리고,
+        스냅샷 체크섬이 마지막으로 올린 것과 같으면 업로드를 생략합니다.
+        """
+        with compressed_snapshot(local_db_path) as snapshot:
+            if snapshot.checksum == self._last_synced_checksum:
+                print(f"[Sync] 변경 사항 없음, 업로드 생략")
+                return self._last_synced_file_id
+
+            # 다른 워커나 재시작 전에 이미 같은 스냅샷을 올렸는지 드라이브 파일 속성으로 확인
+            existing = self.find_file(filename, fields='id, appProperties')
+            if existing and (existing.get('appProperties') or {}).get('sha256') == snapshot.checksum:
+                self._last_synced_checksum, self._last_synced_file_id = snapshot.checksum, existing['id']
+                print(f"[Sync] 드라이브의 DB가 이미 최신 상태, 업로드 생략")
+                return existing['id']
+
+            media = MediaFileUpload(snapshot.path, mimetype='application/gzip', resumable=True, chunksize=5 * 1024 * 1024)
+            app_properties = {
+                'sha256': snapshot.checksum,
+                'raw_size': str(snapshot.raw_size),
+                'base_seq': str(snapshot.seq),
+                'base_time': str(int(time.time()))
+            }
+
+            if existing:
                 # 파일 업데이트
-                updated_file = self.service.files().update(
+                file_id = existing['id']
+                self.service.files().update(
                     fileId=file_id,
+                    body={'appProperties': app_properties},
                     media_body=media
                 ).execute()
-                print(f"[Sync] DB 업데이트 완료 (ID: {file_id})")
-                return updated_file.get('id')
+                print(f"[Sync] DB 업데이트 완료 (ID: {file_id}, {snapshot.raw_size // 1024}KB → {snapshot.compressed_size // 1024}KB)")
             else:
                 # 파일 신규 생성
                 file_metadata = {
                     'name': filename,
-                    'parents': [self.folder_id]
+                    'parents': [self.folder_id],
+                    'appProperties': app_properties
                 }
                 new_file = self.service.files().create(
                     body=file_metadata,
                     media_body=media,
                     fields='id'
                 ).execute()
-                print(f"[Sync] 새 DB 파일 생성 및 업로드 완료 (ID: {new_file.get('id')})")
-                return new_file.get('id')
-        except Exception as e:
-            print(f"DB 동기화 오류: {e}")
-            return None
+                file_id = new_file.get('id')
+                self.remember_file_id(filename, file_id)
+                print(f"[Sync] 새 DB 파일 생성 및 업로드 완료 (ID: {file_id})")
+            self._last_synced_checksum, self._last_synced_file_id = snapshot.checksum, file_id
+
+        # 새 기준 스냅샷에 포함된 변경분은 드라이브의 세그먼트와 로컬 변경 기록에서 정리
+        self.delete_files([segment['id'] for segment in self._list_segments() if segment['last'] <= snapshot.seq])
+        if has_changelog(local_db_path):
+            prune_changes(local_db_path, snapshot.seq)
+        self._backup_state = {
+            'base_id': file_id, 'base_seq': snapshot.seq, 'base_time': time.time(),
+            'shipped_seq': snapshot.seq, 'segments': 0
+        }
+        return file_id
+
+    def _sync_incremental(self, local_db_path, filename):
+        state = self._backup_state or self._load_backup_state(filename)
+        changes = read_changes(local_db_path, state['shipped_seq'])
+        needs_base = (
+            state['base_id'] is None
+            or state['segments'] >= DB_MAX_SEGMENTS
+            or time.time() - state['base_time'] > DB_BASE_MAX_AGE
+            or any(op == 'S' for _, _, op, _, _ in changes)
+        )
+        if needs_base:
+            return self._upload_base(local_db_path, filename)
+        if not changes:
+            print(f"[Sync] 변경 사항 없음, 업로드 생략")
+            return state['base_id']
+
+        name = f"{DB_SEGMENT_PREFIX}{changes[0][0]:012d}-{changes[-1][0]:012d}.gz"
+        with temp_path(os.path.dirname(os.path.abspath(local_db_path)), '.segment.gz') as segment_path:
+            write_segment(changes, segment_path)
+            self.service.files().create(
+                body={'name': name, 'parents': [self.folder_id]},
+                media_body=MediaFileUpload(segment_path, mimetype='application/gzip'),
+                fields='id'
+            ).execute()
+            size = os.path.getsize(segment_path)
+        state['shipped_seq'] = changes[-1][0]
+        state['segments'] += 1
+        print(f"[Sync] 변경 세그먼트 업로드 완료 ({name}, 변경 {len(changes)}건, {size}B)")
+        return state['base_id']
+
+    def _load_backup_state(self, filename):
+        """재시작 후 드라이브의 기준 스냅샷 속성과 세그먼트 목록으로 증분 백업 상태를 복원"""
+        base = self.find_file(filename, fields='id, appProperties')
+        props = (base or {}).get('appProperties') or {}
+        if not base or 'base_seq' not in props:
+            # 기준 스냅샷이 없거나 증분 백업 이전에 올린 파일이면 새 기준 스냅샷부터 시작
+            self._backup_state = {'base_id': None, 'base_seq': 0, 'base_time': 0, 'shipped_seq': 0, 'segments': 0}
+            return self._backup_state
+        base_seq = int(props['base_seq'])
+        segments = [segment for segment in self._list_segments() if segment['last'] > base_seq]
+        self._backup_state = {
+            'base_id': base['id'],
+            'base_seq': base_seq,
+            'base_time': float(props.get('base_time', 0)),
+            'shipped_seq': max([base_seq] + [segment['last'] for segment in segments]),
+            'segments': len(segments)
+        }
+        return self._backup_state
+
+    def _list_segments(self):
+        """드라이브 폴더의 증분 백업 세그먼트 목록 (변경 번호 순)"""
+        segments = []
+        for file_info in self.iter_folder_files(f"name contains '{DB_SEGMENT_PREFIX}'"):
+            match = DB_SEGMENT_PATTERN.match(file_info['name'])
+            if match:
+                segments.append({'id': file_info['id'], 'first': int(match.group(1)), 'last': int(match.group(2))})
+        return sorted(segments, key=lambda segment: (segment['first'], segment['last']))
 
-    def download_database(self, local_db_path, filename='sns.db'):
-        """드라이브에서 DB 파일을 다운로드하여 로컬에 저장"""
+    def iter_folder_files(self, query=None, fields='id, name'):
+        """앱 폴더의 (휴지통에 없는) 파일을 페이지 단위로 조회하며 하나씩 반환"""
+        q = f"'{self.folder_id}' in parents and trashed = false"
+        if query:
+            q = f"{query} and {q}"
+        page_token = None
+        while True:
+            results = self.service.files().list(
+                q=q, fields=f"nextPageToken, files({fields})", pageSize=1000, pageToken=page_token
+            ).execute()
+            yield from results.get('files', [])
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+
+    def download_file(self, file_id, path):
+        """드라이브 파일을 path에 저장 (조각 단위로 받아 메모리에 전체를 올리지 않음)"""
+        if not self.service:
+            raise RuntimeError('구글 드라이브에 연결되지 않았습니다')
+        self._download_to(file_id, path)
+
+    def _download_to(self, file_id, path):
+        request = self.service.files().get_media(fileId=file_id)
+        with io.FileIO(path, 'wb') as f:
+            downloader = MediaIoBaseDownload(f, request)
+            done = False
+            while done is False:
+                status, done = downloader.next_chunk()
+
+    def download_database(self, local_db_path, filename=DB_BACKUP_NAME):
+        """
+        드라이브에서 DB 백업을 다운로드하여 로컬에 저장.
+        기준 스냅샷(sns.db.gz)을 받은 뒤 그 이후의 변경 세그먼트를 순서대로 적용하며,
+        압축 스냅샷이 없으면 이전 버전이 올린 원본 sns.db를 사용합니다.
+        임시 파일에서 복원을 마친 뒤 교체하므로 중간에 실패해도 기존 파일이 손상되지 않습니다.
+        """
         if not self.service:
             return False
             
         try:
             file_id = self.find_file_id(filename)
+            compressed = file_id is not None
+            if not compressed:
+                file_id = self.find_file_id(LEGACY_DB_NAME)
             if not file_id:
                 print(f"[Restore] 드라이브에 {filename} 파일이 없습니다.")
                 return False
-                
-            request = self.service.files().get_media(fileId=file_id)
-            with io.FileIO(local_db_path, 'wb') as f:
-                downloader = MediaIoBaseDownload(f, request)
-                done = False
-                while done is False:
-                    status, done = downloader.next_chunk()
+
+            directory = os.path.dirname(os.path.abspath(local_db_path))
+            with temp_path(directory, '.download') as download_path, temp_path(directory, '.restore') as restore_path:
+                self._download_to(file_id, download_path)
+                if compressed:
+                    decompress_file(download_path, restore_path)
+                    self._apply_remote_segments(restore_path, directory)
+                else:
+                    os.replace(download_path, restore_path)
+                os.replace(restore_path, local_db_path)
+            self._backup_state = None
+            # 복구한 DB의 변경 번호가 달라졌으므로 저장된 백업 상태는 버리고 드라이브에서 다시 복원
+            if os.path.exists(local_db_path + '.sync.json'):
+                os.remove(local_db_path + '.sync.json')
             print(f"[Restore] 드라이브로부터 DB 다운로드 및 복구 완료.")
             return True
         except Exception as e:
             print(f"DB 다운로드 오류: {e}")
             return False
 
-    def delete_file(self, file_id):
-        """파일 ID를 이용해 구글 드라이브에서 파일 삭제"""
-        if not self.service:
+    def restore_database(self, local_db_path, filename=DB_BACKUP_NAME):
+        """
+        시작 시 DB 복구 (호스트당 한 번, 필요할 때만).
+        파일 잠금 아래에서 실행되므로 여러 gunicorn 워커가 동시에 시작해도 다운로드는 한 번만 일어나고,
+        마지막 복구 기록(sns.db.restore.json)과 비교해 다음 경우에는 다운로드를 생략합니다.
+          - 로컬 DB가 마지막 복구 이후 변경됨: 이 호스트가 쓰고 있는 최신 DB이므로 그대로 사용
+          - 로컬 DB가 그대로이고 드라이브 백업(ID, md5Checksum, modifiedTime, 세그먼트)도 그대로임
+          - 복구 기록이 없으면 로컬 DB 스냅샷의 체크섬이 드라이브 기준 스냅샷과 같음
+        """
+        marker_path = local_db_path + '.restore.json'
+        with file_lock(local_db_path + '.restore.lock'):
+            marker = None
+            if os.path.exists(marker_path):
+                with open(marker_path, encoding='utf-8') as f:
+                    marker = json.load(f)
+            local_stat = self._local_stat(local_db_path)
+            if local_stat and marker and marker.get('local') != local_stat:
+                print("[Restore] 로컬 DB가 마지막 복구 이후 변경되어 그대로 사용합니다.")
+                return False
+
+            if not self.service:
+                return False
+            remote = self._remote_version(filename)
+            if remote is None:
+                print(f"[Restore] 드라이브에 {filename} 파일이 없습니다.")
+                return False
+            if local_stat and marker and marker.get('remote') == remote:
+                print("[Restore] 로컬 DB가 드라이브 백업과 같아 다운로드를 생략합니다.")
+                return False
+            if local_stat and not marker and self._local_matches_remote(local_db_path, remote):
+                self._write_restore_marker(marker_path, local_db_path, remote)
+                print("[Restore] 로컬 DB 체크섬이 드라이브 백업과 같아 다운로드를 생략합니다.")
+                return False
+
+            if not self.download_database(local_db_path, filename):
+                return False
+            self._write_restore_marker(marker_path, local_db_path, remote)
+            return True
+
+    @staticmethod
+    def _local_stat(path):
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def _write_restore_marker(self, marker_path, local_db_path, remote):
+        with open(marker_path, 'w', encoding='utf-8') as f:
+            json.dump({'local': self._local_stat(local_db_path), 'remote': remote, 'restored_at': time.time()}, f)
+
+    def _remote_version(self, filename):
+        """
+        드라이브 백업의 현재 상태 (기준 스냅샷/원본 파일과 세그먼트 목록을 한 번의 목록 조회로 확인).
+        세그먼트가 1000개를 넘어도 전체 목록으로 비교하도록 다음 페이지까지 모두 조회합니다.
+        """
+        files = {
+            file_info['name']: file_info for file_info in self.iter_folder_files(
+                f"name contains '{LEGACY_DB_NAME}'", fields='id, name, md5Checksum, modifiedTime, appProperties'
+            )
+        }
+        base = files.get(filename) or files.get(LEGACY_DB_NAME)
+        if not base:
+            return None
+        props = base.get('appProperties') or {}
+        base_seq = int(props.get('base_seq', 0))
+        segments = sorted(
+            name for name in files
+            if DB_SEGMENT_PATTERN.match(name) and int(DB_SEGMENT_PATTERN.match(name).group(2)) > base_seq
+        )
+        return {
+            'id': base['id'], 'name': base['name'], 'md5Checksum': base.get('md5Checksum'),
+            'modifiedTime': base.get('modifiedTime'), 'sha256': props.get('sha256'), 'segments': segments
+        }
+
+    @staticmethod
+    def _local_matches_remote(local_db_path, remote):
+        if not remote.get('sha256') or remote['segments']:
             return False
-            
         try:
-            self.service.files().delete(fileId=file_id).execute()
-            return True
+            return snapshot_checksum(local_db_path) == remote['sha256']
         except Exception as e:
-            print(f"파일 삭제 오류 ({file_id}): {e}")
+            print(f"[Restore] 로컬 DB 체크섬 계산 실패: {e}")
             return False
 
+    def _apply_remote_segments(self, restore_path, directory):
+        base_seq = snapshot_seq(restore_path)
+        segments = [segment for segment in self._list_segments() if segment['last'] > base_seq]
+        if not segments:
+            return
+        with tempfile.TemporaryDirectory(dir=directory) as segment_dir:
+            paths = []
+            for i, segment in enumerate(segments):
+                path = os.path.join(segment_dir, f'{i:05d}.gz')
+                self._download_to(segment['id'], path)
+                paths.append(path)
+            applied = apply_segments(restore_path, paths, base_seq)
+        print(f"[Restore] 변경 세그먼트 {len(segments)}개 적용 (변경 번호 {base_seq} → {applied})")
+
+    def get_thumbnail_links(self, file_ids):
+        """
+        여러 파일의 thumbnailLink를 Drive 배치 요청(최대 100개씩)으로 한 번에 조회.
+        반환값: {file_id: 링크 또는 None(썸네일 없음/파일 없음)}, 일시적인 오류가 난 파일은 결과에서 제외
+        """
+        if not self.service or not file_ids:
+            return {}
+        file_ids = list(dict.fromkeys(file_ids))
+        results = self.execute_batch([
+            (file_id, self.service.files().get(fileId=file_id, fields='thumbnailLink')) for file_id in file_ids
+        ])
+        links = {}
+        for file_id, (response, exception) in results.items():
+            if exception is None:
+                links[file_id] = response.get('thumbnailLink')
+            elif self._is_not_found(exception):
+                links[file_id] = None
+            else:
+                print(f"썸네일 링크 조회 오류 ({file_id}): {exception}")
+        return links
+
+    def delete_file(self, file_id):
+        """파일 ID를 이용해 구글 드라이브에서 파일 삭제"""
+        return self.delete_files([file_id]).get(file_id, False)
+
+    def delete_files(self, file_ids):
+        """
+        여러 파일을 배치 요청 한 번으로 삭제.
+        반환값: {file_id: 성공 여부} — 이미 없는 파일(404)은 삭제된 것으로 봅니다.
+        """
+        if not self.service or not file_ids:
+            return {}
+        file_ids = list(dict.fromkeys(file_ids))
+        results = self.execute_batch([(file_id, self.service.files().delete(fileId=file_id)) for file_id in file_ids])
+        deleted = {}
+        for file_id in file_ids:
+            exception = results[file_id][1]
+            deleted[file_id] = exception is None or self._is_not_found(exception)
+            if not deleted[file_id]:
+                print(f"파일 삭제 오류 ({file_id}): {exception}")
+        return deleted
+
 # 싱글톤 인스턴스 생성
 drive_manager = GoogleDriveManager()
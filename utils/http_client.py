@@ -0,0 +1,81 @@
+import os
+import threading
+import requests
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_BACKOFF_MAX = 2   # 재시도 사이 대기 상한(초)
+
+
+class HttpClient:
+    """
+    모든 외부 HTTP 호출(URL 미리보기, 날씨 봇, 구글 드라이브 업로드 세션 등)이 공유하는 클라이언트.
+    호스트별 연결 풀을 유지해 같은 서버로 반복되는 요청이 TCP/TLS 핸드셰이크를 다시 하지 않도록 하고,
+    재시도/백오프 정책과 기본 타임아웃을 한 곳에서 관리합니다.
+    urllib3 연결 풀은 스레드 안전하며, 쿠키는 저장하지 않으므로 여러 스레드에서 동시에 사용해도 됩니다.
+    """
+
+    def __init__(self, pool_connections=20, pool_maxsize=20, retries=2, backoff_factor=0.3, timeout=(5, 15)):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        session = requests.Session()
+        # 연결 실패/일시적 서버 오류만 짧은 백오프로 재시도.
+        # 미리보기 마감 시간이나 요청 스레드가 서버가 정한 시간만큼 묶이지 않도록 Retry-After는 따르지 않고,
+        # 429(요청 과다)는 기다려도 곧 풀리지 않으므로 재시도하지 않고 바로 호출한 쪽에 돌려줌.
+        # 읽기 타임아웃도 마감 시간을 늘리므로 재시도하지 않음
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=0,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            backoff_max=RETRY_BACKOFF_MAX,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+            respect_retry_after_header=False,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        # 여러 사이트/스레드가 세션을 공유하므로 쿠키는 저장하지 않음
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        return session
+
+    def request(self, method, url, timeout=None, **kwargs):
+        return self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+
+# 싱글톤 인스턴스 생성
+http_client = HttpClient(
+    pool_maxsize=int(os.environ.get('HTTP_POOL_MAXSIZE', 20)),
+    retries=int(os.environ.get('HTTP_RETRIES', 2))
+)
@@ -0,0 +1,269 @@
+import io
+import os
+import uuid
+import base64
+import tempfile
+import threading
+import multiprocessing
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageOps
+from utils.background import BackgroundWorker
+from utils.time_utils import get_korean_time_for_db
+
+# 이 모듈은 이미지 처리 프로세스에서도 import되므로 무거운 모듈(Flask, 드라이브 등)은 함수 안에서 import합니다.
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+PLACEHOLDER_WIDTH = 16        # 흐린 자리표시 이미지 너비 (브라우저가 확대하면서 자연스럽게 흐려짐)
+
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))              # 이미지 처리 프로세스 수
+IMAGE_SOURCE_MAX_MB = int(os.environ.get('IMAGE_SOURCE_MAX_MB', 50))  # 이보다 큰 원본은 드라이브 썸네일로 처리
+IMAGE_BATCH_SIZE = 10         # 한 번에 처리할 첨부 이미지 수
+IMAGE_MAX_ATTEMPTS = 3
+CLAIM_TIMEOUT = timedelta(minutes=15)   # 워커가 처리 중 종료되어 남은 선점을 다시 가져갈 시간
+MAX_TASKS_PER_CHILD = 50      # Pillow 메모리 단편화가 쌓이지 않도록 이만큼 처리한 프로세스는 교체
+
+
+def resize_to(image, width):
+    """width보다 넓으면 비율을 유지해 줄임 (확대하지 않음)"""
+    if image.width <= width:
+        return image
+    return image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+
+
+def encode(image, fmt):
+    """FORMATS의 형식으로 인코딩한 바이트 (JPEG은 투명 영역을 흰 배경으로 합성)"""
+    pil_format, _, options = FORMATS[fmt]
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if pil_format == 'JPEG' and has_alpha:
+        rgba = image.convert('RGBA')
+        image = Image.new('RGB', rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.getchannel('A'))
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def write_atomic(path, data):
+    # 다른 워커가 쓰는 중인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def open_image(source, max_width=None):
+    """
+    이미지를 열어 EXIF 방향을 바로잡아 반환: (이미지, 원본 너비, 원본 높이).
+    max_width를 주면 JPEG은 디코딩 단계에서 축소(draft)해 큰 사진도 빠르고 적은 메모리로 처리합니다.
+    """
+    with Image.open(source) as opened:
+        width, height = opened.size
+        if opened.getexif().get(0x0112) in (5, 6, 7, 8):  # 90도 회전된 사진은 가로/세로가 바뀜
+            width, height = height, width
+        if max_width and opened.format == 'JPEG' and width > max_width:
+            opened.draft('RGB', (max_width, max(1, max_width * height // width)))
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+    return image, width, height
+
+
+def render_variants(source, variant_paths):
+    """
+    원본 이미지로 썸네일 변형과 자리표시 이미지를 만들어 저장 (이미지 처리 프로세스에서 실행).
+    variant_paths: {(너비, 형식): 저장 경로}
+    반환값: {'width', 'height', 'placeholder'(data URI), 'bytes'(저장한 변형 크기 합)}
+    """
+    widths = sorted({width for width, _ in variant_paths})
+    image, width, height = open_image(source, max_width=widths[-1])
+    written = 0
+    for target in widths:
+        resized = resize_to(image, target)
+        for (variant_width, fmt), path in variant_paths.items():
+            if variant_width == target:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                written += write_atomic(path, encode(resized, fmt))
+    tiny = encode(resize_to(image, PLACEHOLDER_WIDTH), 'webp')
+    return {
+        'width': width,
+        'height': height,
+        'placeholder': 'data:image/webp;base64,' + base64.b64encode(tiny).decode(),
+        'bytes': written
+    }
+
+
+class ImageProcessPool:
+    """
+    Pillow 작업(디코딩/리사이즈/인코딩)을 요청 처리 스레드와 GIL 밖에서 실행하는 프로세스 풀.
+    스레드가 여러 개 돌고 있는 gunicorn 워커에서 fork하면 잠금이 잡힌 채 복제될 수 있으므로 spawn으로 만들고,
+    처음 사용할 때 생성합니다 (fork된 워커는 각자 자기 풀을 가짐).
+    """
+
+    def __init__(self, max_workers=IMAGE_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    max_tasks_per_child=MAX_TASKS_PER_CHILD
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def submit(self, func, *args):
+        return self.executor.submit(func, *args)
+
+
+image_pool = ImageProcessPool()
+
+_queued_post_ids = set()
+_queue_lock = threading.Lock()
+
+
+def enqueue_post(post_id):
+    """방금 저장된 게시글의 첨부 이미지를 바로 처리하도록 요청"""
+    with _queue_lock:
+        _queued_post_ids.add(post_id)
+    image_worker.wake()
+
+
+def _fetch_source(attachment, directory):
+    """
+    처리할 원본을 임시 파일로 받아 경로를 반환.
+    너무 큰 원본은 드라이브가 만든 큰 썸네일을 대신 사용합니다 (변형 중 가장 큰 너비면 충분).
+    """
+    from utils.google_drive_utils import drive_manager
+    from utils.thumbnail_links import thumbnail_links, sized_link
+    from utils.thumbnail_store import thumbnail_store
+    from utils.http_client import http_client
+
+    # 임시 파일 이름에 파일 ID를 쓰지 않음 (DB 값이 경로에 섞이지 않도록)
+    fd, path = tempfile.mkstemp(dir=directory)
+    os.close(fd)
+    if attachment.size and attachment.size <= IMAGE_SOURCE_MAX_MB * 1024 * 1024:
+        drive_manager.download_file(attachment.file_id, path)
+        return path
+    link = thumbnail_links.get(attachment.file_id)
+    if not link:
+        raise ValueError('드라이브 썸네일이 아직 없습니다')
+    with http_client.get(sized_link(link, thumbnail_store.widths[-1]), stream=True) as response:
+        response.raise_for_status()
+        with open(path, 'wb') as f:
+            for chunk in response.iter_content(1024 * 1024):
+                f.write(chunk)
+    return path
+
+
+def _claim_batch(db, PostAttachment, post_ids):
+    """
+    처리할 첨부 이미지를 선점 (이 프로세스에서 요청된 게시글 먼저, 나머지는 최신순으로 IMAGE_BATCH_SIZE개).
+    UPDATE의 WHERE에서 조건을 다시 확인하므로 여러 워커가 같은 이미지를 두 번 가져가지 않으며,
+    시도 횟수도 선점과 함께 SQL에서 증가시킵니다.
+    반환값: (선점한 행 목록, 남은 작업이 더 있는지)
+    """
+    now = get_korean_time_for_db()
+    claimable = db.and_(
+        PostAttachment.mime_prefix('image/'),
+        PostAttachment.width.is_(None),
+        db.or_(PostAttachment.image_attempts.is_(None), PostAttachment.image_attempts < IMAGE_MAX_ATTEMPTS),
+        db.or_(PostAttachment.image_claim_token.is_(None), PostAttachment.image_claimed_at <= now - CLAIM_TIMEOUT)
+    )
+    ids = []
+    if post_ids:
+        ids = [row.id for row in db.session.query(PostAttachment.id).filter(claimable, PostAttachment.post_id.in_(post_ids))]
+    backlog_ids = [
+        row.id for row in db.session.query(PostAttachment.id).filter(claimable)
+        .order_by(PostAttachment.id.desc()).limit(IMAGE_BATCH_SIZE)
+    ]
+    ids += [row_id for row_id in backlog_ids if row_id not in ids]
+    if not ids:
+        return [], False
+    token = uuid.uuid4().hex
+    PostAttachment.query.filter(PostAttachment.id.in_(ids), claimable).update({
+        'image_claim_token': token,
+        'image_claimed_at': now,
+        'image_attempts': db.func.coalesce(PostAttachment.image_attempts, 0) + 1
+    }, synchronize_session=False)
+    db.session.commit()
+    return PostAttachment.query.filter_by(image_claim_token=token).all(), len(backlog_ids) == IMAGE_BATCH_SIZE
+
+
+def process_pending_images():
+    """
+    크기/자리표시 정보가 없는 첨부 이미지를 처리합니다.
+    원본은 이 스레드에서 내려받고, Pillow 처리는 프로세스 풀에서 병렬로 실행한 뒤
+    결과(크기, 자리표시 이미지)를 첨부 파일 행에 저장하고 썸네일 변형은 로컬 썸네일 저장소에 둡니다.
+    이 프로세스에서 요청된 게시글을 먼저 처리하고, 이전 업로드나 실패한 항목은 주기적으로 채웁니다.
+    """
+    from extensions import db
+    from models import PostAttachment
+    from utils.thumbnail_store import thumbnail_store
+    from utils.google_drive_utils import drive_manager
+
+    if not drive_manager.service:
+        # 드라이브 연결이 없을 때 실패로 기록해 재시도 횟수를 소모하지 않도록 다음 실행으로 미룸
+        return False
+    with _queue_lock:
+        post_ids = list(_queued_post_ids)
+        _queued_post_ids.clear()
+
+    rows, more = _claim_batch(db, PostAttachment, post_ids)
+    if not rows:
+        return False
+
+    with tempfile.TemporaryDirectory() as directory:
+        futures = {}
+        for row in rows:
+            if not thumbnail_store.valid_id(row.file_id):
+                # 드라이브 ID 형식이 아닌 값으로는 어떤 경로도 만들지 않고 다시 시도하지도 않음
+                print(f"[Image] 잘못된 파일 ID, 건너뜀 (첨부 {row.id})")
+                row.image_attempts = IMAGE_MAX_ATTEMPTS
+                continue
+            try:
+                source = _fetch_source(row, directory)
+                variant_paths = {
+                    (width, fmt): thumbnail_store.path(row.file_id, width, fmt)
+                    for width in thumbnail_store.widths for fmt in FORMATS
+                }
+                futures[row.id] = image_pool.submit(render_variants, source, variant_paths)
+            except Exception as e:
+                print(f"[Image] 원본 가져오기 실패 ({row.file_id}): {e}")
+
+        now = get_korean_time_for_db()
+        processed = written = 0
+        for row in rows:
+            row.image_claim_token = None
+            future = futures.get(row.id)
+            if future is None:
+                continue
+            try:
+                meta = future.result()
+            except Exception as e:
+                print(f"[Image] 이미지 처리 실패 ({row.file_id}): {e}")
+                continue
+            row.width, row.height, row.placeholder = meta['width'], meta['height'], meta['placeholder']
+            # updated_at을 갱신해 캐시된 카드 조각이 크기/자리표시와 함께 다시 렌더링되도록 함
+            row.post.updated_at = now
+            processed += 1
+            written += meta['bytes']
+    db.session.commit()
+    if processed:
+        thumbnail_store.note_written(written)
+    print(f"[Image] 첨부 이미지 {len(rows)}건 중 {processed}건 처리 완료")
+    return more
+
+
+image_worker = BackgroundWorker('image-worker', process_pending_images, interval=300)
@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(created_at, post_id):
+    """(created_at, id) 위치를 클라이언트에 넘길 불투명 커서 문자열로 변환"""
+    raw = json.dumps([created_at.isoformat(), post_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """커서 문자열을 (created_at, id)로 복원. 형식이 잘못되면 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, post_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(post_id)
+    except Exception as e:
+        raise ValueError(f"잘못된 커서입니다: {cursor}") from e
+
+
+def keyset_paginate(query, created_col, id_col, cursor=None, per_page=10):
+    """
+    OFFSET/COUNT 없이 (created_at, id) 기준 내림차순으로 다음 페이지를 가져옵니다.
+    per_page + 1개를 조회해 다음 페이지 존재 여부를 판단하므로 페이지 깊이와 무관하게 비용이 일정합니다.
+    반환값: (items, next_cursor) — 다음 페이지가 없으면 next_cursor는 None
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            created_col < created_at,
+            and_(created_col == created_at, id_col < last_id)
+        ))
+
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+    return items, next_cursor
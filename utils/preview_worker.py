@@ -0,0 +1,109 @@
+import os
+import uuid
+import random
+import threading
+from datetime import timedelta
+from utils.background import BackgroundWorker
+from utils.url_utils import url_preview_generator
+from utils.time_utils import get_korean_time_for_db
+
+# 'async': 게시글을 먼저 저장하고 미리보기는 백그라운드에서 채움, 'sync': 저장 전에 미리보기 생성
+URL_PREVIEW_MODE = os.environ.get('URL_PREVIEW_MODE', 'async')
+
+ENRICH_DEADLINE = 20          # 한 번의 처리에서 외부 사이트를 기다리는 최대 시간(초)
+STALE_BATCH_SIZE = 20         # 재시작 등으로 남은 pending 미리보기를 한 번에 처리할 개수
+STALE_AFTER = timedelta(minutes=1)
+PREVIEW_MAX_ATTEMPTS = 5      # 마감 초과 등으로 결과를 얻지 못한 미리보기를 포기하기까지의 시도 횟수
+RETRY_BASE_DELAY = 60         # 첫 재시도까지 대기(초), 이후 2배씩 증가
+RETRY_MAX_DELAY = 3600        # 재시도 간격 상한(초)
+CLAIM_TIMEOUT = timedelta(minutes=5)   # 워커가 가져오는 중 종료되어 남은 'fetching' 행을 다시 가져갈 시간
+
+_queued_post_ids = set()
+_queue_lock = threading.Lock()
+
+
+def enqueue_post(post_id):
+    """방금 저장된 게시글의 pending 미리보기를 즉시 처리하도록 요청"""
+    with _queue_lock:
+        _queued_post_ids.add(post_id)
+    preview_worker.wake()
+
+
+def retry_delay(attempts):
+    """지수 백오프 + 지터: 60초, 120초, 240초 ... (최대 1시간)"""
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** max(attempts - 1, 0)))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _claim_batch(db, PostUrlPreview, post_ids):
+    """
+    가져올 미리보기 행을 선점.
+    이 프로세스에서 요청된 게시글의 행은 바로, 그 밖의 행은 next_attempt_at이 지난 뒤 가져가며,
+    UPDATE의 WHERE에서 상태를 다시 확인하므로 여러 워커가 같은 행을 두 번 가져오지 않습니다.
+    """
+    now = get_korean_time_for_db()
+    due = db.or_(PostUrlPreview.next_attempt_at.is_(None), PostUrlPreview.next_attempt_at <= now)
+    if post_ids:
+        due = db.or_(due, db.and_(PostUrlPreview.post_id.in_(post_ids), PostUrlPreview.attempts == 0))
+    claimable = db.or_(
+        db.and_(PostUrlPreview.status == 'pending', due),
+        db.and_(PostUrlPreview.status == 'fetching', PostUrlPreview.claimed_at <= now - CLAIM_TIMEOUT)
+    )
+    limit = STALE_BATCH_SIZE + (len(post_ids) * 10 if post_ids else 0)
+    due_ids = db.session.query(PostUrlPreview.id).filter(claimable).order_by(PostUrlPreview.next_attempt_at).limit(limit)
+    token = uuid.uuid4().hex
+    PostUrlPreview.query.filter(PostUrlPreview.id.in_(due_ids.scalar_subquery()), claimable).update(
+        {'status': 'fetching', 'claim_token': token, 'claimed_at': now}, synchronize_session=False
+    )
+    db.session.commit()
+    return PostUrlPreview.query.filter_by(claim_token=token).all(), limit
+
+
+def enrich_pending_previews():
+    """
+    pending 상태의 URL 미리보기를 가져와 채웁니다.
+    이 프로세스에서 요청된 게시글은 바로 처리하고, 다른 워커나 재시작 전에 남겨진 항목과 재시도 항목은
+    next_attempt_at이 지난 뒤 주기적으로 정리합니다.
+    미리보기를 만들 수 없다고 확인된 URL(실패가 캐시된 경우)만 삭제하고, 마감 초과처럼 결과가 없는 경우는
+    백오프 후 다시 시도하며 PREVIEW_MAX_ATTEMPTS번 실패하면 삭제합니다.
+    """
+    from extensions import db
+    from models import PostUrlPreview
+
+    with _queue_lock:
+        post_ids = list(_queued_post_ids)
+        _queued_post_ids.clear()
+
+    rows, limit = _claim_batch(db, PostUrlPreview, post_ids)
+    if not rows:
+        return False
+
+    preview_map = url_preview_generator.get_url_preview_map(list({row.url for row in rows}), deadline=ENRICH_DEADLINE)
+    now = get_korean_time_for_db()
+    touched_posts = set()
+    retried = 0
+    for row in rows:
+        preview = preview_map.get(row.url)
+        if preview:
+            row.apply_preview(preview)
+            touched_posts.add(row.post)
+            continue
+        row.attempts += 1
+        if url_preview_generator.is_known_failure(row.url) or row.attempts >= PREVIEW_MAX_ATTEMPTS:
+            db.session.delete(row)
+            touched_posts.add(row.post)
+            continue
+        row.status = 'pending'
+        row.claim_token = None
+        row.next_attempt_at = now + retry_delay(row.attempts)
+        retried += 1
+
+    # updated_at을 갱신해 캐시된 카드 조각이 새 미리보기로 다시 렌더링되도록 함
+    for post in touched_posts:
+        post.updated_at = now
+    db.session.commit()
+    print(f"[Preview] 게시글 {len(touched_posts)}개의 URL 미리보기 {len(rows)}건 처리 완료 (재시도 대기 {retried}건)")
+    return len(rows) == limit
+
+
+preview_worker = BackgroundWorker('preview-worker', enrich_pending_previews, interval=60)
@@ -0,0 +1,77 @@
+import os
+import time
+import threading
+from urllib.parse import urlparse
+from py_vapid import Vapid
+from pywebpush import WebPusher, WebPushException
+from utils.http_client import HttpClient
+
+
+class VapidSigner:
+    """
+    VAPID 서명 헤더 캐시.
+    개인 키는 처음 한 번만 읽고, 서명된 JWT 헤더는 푸시 서비스 origin(aud)별로 만료 직전까지 재사용합니다.
+    pywebpush.webpush는 전송할 때마다 키를 다시 파싱하고 ECDSA 서명을 새로 하므로 이 비용을 없앱니다.
+    """
+
+    TOKEN_LIFETIME = 12 * 60 * 60   # JWT 유효 기간 (푸시 서비스 허용 최대 24시간)
+    REFRESH_MARGIN = 60 * 60        # 만료 이 시간(초) 전에 새로 서명
+
+    def __init__(self, private_key, claim_email):
+        self.private_key = private_key
+        self.claim_email = claim_email
+        self._vapid = None
+        self._headers = {}  # aud -> (헤더 dict, 만료 시각)
+        self._lock = threading.Lock()
+
+    def _load_key(self):
+        if self._vapid is None:
+            if not self.private_key:
+                raise WebPushException("VAPID dict missing 'private_key'")
+            if os.path.isfile(self.private_key):
+                self._vapid = Vapid.from_file(private_key_file=self.private_key)
+            else:
+                self._vapid = Vapid.from_string(private_key=self.private_key)
+        return self._vapid
+
+    def headers_for(self, endpoint):
+        url = urlparse(endpoint)
+        aud = f"{url.scheme}://{url.netloc}"
+        now = time.time()
+        cached = self._headers.get(aud)
+        if cached and cached[1] - self.REFRESH_MARGIN > now:
+            return cached[0]
+        with self._lock:
+            cached = self._headers.get(aud)
+            if cached and cached[1] - self.REFRESH_MARGIN > now:
+                return cached[0]
+            exp = int(now) + self.TOKEN_LIFETIME
+            headers = self._load_key().sign({'sub': self.claim_email, 'aud': aud, 'exp': exp})
+            self._headers[aud] = (headers, exp)
+            return headers
+
+
+class WebPushClient:
+    """
+    웹 푸시 전송 클라이언트.
+    캐시된 VAPID 헤더를 사용하고, 푸시 서비스 origin별 keep-alive 연결 풀로 전송합니다.
+    재시도는 호출한 쪽(푸시 대기열)이 결정하므로 HTTP 수준 재시도는 하지 않습니다.
+    """
+
+    def __init__(self, private_key, claim_email, timeout=10, pool_maxsize=8):
+        self.signer = VapidSigner(private_key, claim_email)
+        self.timeout = timeout
+        self.http = HttpClient(pool_maxsize=pool_maxsize, retries=0)
+
+    def send(self, subscription_info, data, ttl=0):
+        """pywebpush.webpush와 같은 규칙으로 전송하고, 202 초과 응답이면 WebPushException을 발생시킴"""
+        headers = dict(self.signer.headers_for(subscription_info['endpoint']))
+        response = WebPusher(subscription_info, requests_session=self.http.session).send(
+            data, headers, ttl=ttl, timeout=self.timeout
+        )
+        if response.status_code > 202:
+            raise WebPushException(
+                "Push failed: {} {}\nResponse body:{}".format(response.status_code, response.reason, response.text),
+                response=response
+            )
+        return response
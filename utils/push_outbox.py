@@ -0,0 +1,237 @@
+import os
+import json
+import uuid
+import random
+import threading
+from collections import deque
+from datetime import timedelta
+from utils.background import BackgroundWorker
+from utils.time_utils import get_korean_time_for_db
+
+PUSH_BATCH_SIZE = int(os.environ.get('PUSH_BATCH_SIZE', 100))   # 한 번에 가져가 전송할 최대 작업 수
+PUSH_MAX_ATTEMPTS = int(os.environ.get('PUSH_MAX_ATTEMPTS', 6))  # 이 횟수만큼 실패하면 'failed'로 보관
+RETRY_BASE_DELAY = 30                    # 첫 재시도까지 대기(초), 이후 2배씩 증가
+RETRY_MAX_DELAY = 3600                   # 재시도 간격 상한(초)
+CLAIM_TIMEOUT = timedelta(minutes=5)     # 워커가 전송 중 종료되어 남은 'sending' 작업을 다시 가져갈 시간
+FAILED_RETENTION = timedelta(days=7)     # 영구 실패한 작업 보관 기간
+
+PUSH_COALESCE_SECONDS = int(os.environ.get('PUSH_COALESCE_SECONDS', 30))  # 같은 종류의 알림을 모으는 시간
+PUSH_RATE_LIMIT = int(os.environ.get('PUSH_RATE_LIMIT', 10))              # 기기당 PUSH_RATE_WINDOW 동안 보낼 최대 알림 수
+PUSH_RATE_WINDOW = timedelta(seconds=int(os.environ.get('PUSH_RATE_WINDOW', 3600)))
+
+
+class PushOutboxMetrics:
+    """이 프로세스의 디스패처가 처리한 결과와 전송 지연(대기열 등록 → 전송 완료) 통계"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.counts = {'sent': 0, 'retry': 0, 'failed': 0, 'expired': 0}
+
+    def record(self, outcome, latency=None):
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+            if latency is not None:
+                self._latencies.append(latency)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counts = dict(self.counts)
+        result = {'processed': counts, 'latency_samples': len(latencies)}
+        if latencies:
+            result.update({
+                'latency_avg': round(sum(latencies) / len(latencies), 3),
+                'latency_p50': round(latencies[len(latencies) // 2], 3),
+                'latency_p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+                'latency_max': round(latencies[-1], 3),
+            })
+        return result
+
+
+push_metrics = PushOutboxMetrics()
+
+
+def enqueue_push(title, body, url='/', user_ids=None, exclude_user_id=None, collapse_key=None, digest=None, digest_url=None):
+    """
+    대상 구독마다 대기열 행을 추가합니다.
+    요청 스레드에서는 DB에 기록만 하므로 푸시 서비스가 느려도 응답이 지연되지 않습니다.
+
+    collapse_key가 같은 알림은 아직 전송되지 않았다면 하나로 합쳐집니다.
+    새 행은 PUSH_COALESCE_SECONDS만큼 늦게 보내 그 사이 이어지는 이벤트를 모으고,
+    합쳐진 알림은 digest(예: '새 댓글 {count}개')를 제목으로, digest_url을 링크로 사용합니다.
+    기기당 PUSH_RATE_WINDOW 동안 PUSH_RATE_LIMIT개를 넘으면 다음 구간으로 미뤄 계속 합쳐지도록 합니다.
+    """
+    from extensions import db
+    from models import PushSubscription, PushOutbox
+    from blueprints.push import target_subscriptions
+
+    subscription_ids = [row.id for row in target_subscriptions(user_ids, exclude_user_id).with_entities(PushSubscription.id)]
+    if not subscription_ids:
+        return 0
+    payload = json.dumps({'title': title, 'body': body, 'url': url, 'digest': digest, 'digest_url': digest_url})
+
+    merged = set()
+    if collapse_key:
+        # 아직 선점되지 않은 같은 종류의 알림에 합침 (status 조건으로 디스패처와의 경합 방지)
+        pending = db.and_(
+            PushOutbox.subscription_id.in_(subscription_ids),
+            PushOutbox.collapse_key == collapse_key,
+            PushOutbox.status == 'pending'
+        )
+        PushOutbox.query.filter(pending).update(
+            {'event_count': PushOutbox.event_count + 1, 'payload': payload}, synchronize_session=False
+        )
+        merged = {row.subscription_id for row in db.session.query(PushOutbox.subscription_id).filter(pending)}
+
+    now = get_korean_time_for_db()
+    new_ids = [sid for sid in subscription_ids if sid not in merged]
+    used = _rate_window_usage(db, PushOutbox, new_ids, now) if new_ids else {}
+    for sid in new_ids:
+        send_at = now + timedelta(seconds=PUSH_COALESCE_SECONDS)
+        if used.get(sid, 0) >= PUSH_RATE_LIMIT:
+            send_at = now + PUSH_RATE_WINDOW
+        db.session.add(PushOutbox(subscription_id=sid, payload=payload, collapse_key=collapse_key, next_attempt_at=send_at))
+    db.session.commit()
+    if new_ids and PUSH_COALESCE_SECONDS <= 0:
+        push_dispatcher.wake()
+    return len(subscription_ids)
+
+
+def _rate_window_usage(db, PushOutbox, subscription_ids, now):
+    """구독별로 최근 PUSH_RATE_WINDOW 동안 보낸 알림과 대기 중인 알림 수"""
+    rows = db.session.query(PushOutbox.subscription_id, db.func.count(PushOutbox.id)).filter(
+        PushOutbox.subscription_id.in_(subscription_ids),
+        db.or_(
+            PushOutbox.status.in_(('pending', 'sending')),
+            db.and_(PushOutbox.status == 'sent', PushOutbox.sent_at >= now - PUSH_RATE_WINDOW)
+        )
+    ).group_by(PushOutbox.subscription_id)
+    return dict(rows.all())
+
+
+def render_payload(job):
+    """대기열 작업을 실제 전송할 알림 JSON으로 변환 (여러 이벤트가 합쳐졌으면 요약 제목 사용)"""
+    payload = json.loads(job.payload)
+    message = {'title': payload['title'], 'body': payload['body'], 'url': payload['url']}
+    if (job.event_count or 1) > 1 and payload.get('digest'):
+        message['title'] = payload['digest'].format(count=job.event_count)
+        message['url'] = payload.get('digest_url') or payload['url']
+    return json.dumps(message)
+
+
+def retry_delay(attempts):
+    """지수 백오프 + 지터: 30초, 60초, 120초 ... (최대 1시간)"""
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** max(attempts - 1, 0)))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _claim_batch(db, PushOutbox):
+    """
+    전송할 작업을 배치 단위로 선점.
+    UPDATE의 WHERE에서 상태를 다시 확인하므로 여러 워커가 동시에 실행해도 같은 작업을 두 번 가져가지 않습니다.
+    """
+    now = get_korean_time_for_db()
+    claimable = db.or_(
+        db.and_(PushOutbox.status == 'pending', PushOutbox.next_attempt_at <= now),
+        db.and_(PushOutbox.status == 'sending', PushOutbox.claimed_at <= now - CLAIM_TIMEOUT)
+    )
+    due_ids = db.session.query(PushOutbox.id).filter(claimable).order_by(PushOutbox.next_attempt_at).limit(PUSH_BATCH_SIZE)
+    token = uuid.uuid4().hex
+    PushOutbox.query.filter(PushOutbox.id.in_(due_ids.scalar_subquery()), claimable).update(
+        {'status': 'sending', 'claim_token': token, 'claimed_at': now}, synchronize_session=False
+    )
+    db.session.commit()
+    return PushOutbox.query.filter_by(claim_token=token).all()
+
+
+def dispatch_push_outbox():
+    """
+    대기열에서 전송할 작업을 가져와 병렬로 보내고 결과를 반영합니다.
+    성공한 작업은 'sent'로 표시, 일시적 실패는 백오프 후 재시도, 만료된 구독은 한 번에 정리합니다.
+    """
+    from extensions import db
+    from models import PushSubscription, PushOutbox
+    from blueprints.push import deliver_push, delete_subscriptions, push_executor
+
+    jobs = _claim_batch(db, PushOutbox)
+    if not jobs:
+        _purge_finished(db, PushOutbox)
+        return False
+
+    subscriptions = {
+        sub.id: sub for sub in PushSubscription.query.filter(
+            PushSubscription.id.in_({job.subscription_id for job in jobs})
+        )
+    }
+    # 구독이 이미 삭제된 작업은 보내지 않고 버림
+    orphans = [job for job in jobs if job.subscription_id not in subscriptions]
+    jobs = [job for job in jobs if job.subscription_id in subscriptions]
+    for job in orphans:
+        db.session.delete(job)
+
+    outcomes = list(push_executor.map(
+        lambda job: deliver_push(subscriptions[job.subscription_id], render_payload(job)), jobs
+    ))
+
+    now = get_korean_time_for_db()
+    expired_ids = set()
+    for job, (outcome, error) in zip(jobs, outcomes):
+        if outcome == 'sent':
+            push_metrics.record('sent', (now - job.created_at).total_seconds())
+            # 기기별 전송 한도를 계산할 수 있도록 PUSH_RATE_WINDOW 동안 보관
+            job.status = 'sent'
+            job.sent_at = now
+            job.claim_token = None
+            continue
+        if outcome == 'expired':
+            push_metrics.record('expired')
+            expired_ids.add(job.subscription_id)
+            continue
+        job.attempts += 1
+        job.last_error = (error or '')[:500]
+        job.claim_token = None
+        if outcome == 'retry' and job.attempts < PUSH_MAX_ATTEMPTS:
+            push_metrics.record('retry')
+            job.status = 'pending'
+            job.next_attempt_at = now + retry_delay(job.attempts)
+        else:
+            push_metrics.record('failed')
+            job.status = 'failed'
+            print(f"[Push] 전송 실패 (구독 {job.subscription_id}, {job.attempts}회 시도): {error}")
+    db.session.commit()
+    # 만료된 구독에 남은 작업(이번 배치 포함)과 구독을 한 번에 삭제
+    if expired_ids:
+        delete_subscriptions(list(expired_ids))
+        db.session.commit()
+
+    sent = sum(1 for outcome, _ in outcomes if outcome == 'sent')
+    print(f"[Push] 대기열 {len(jobs)}건 처리: 전송 {sent}건, 만료 {len(expired_ids)}개 구독")
+    return len(jobs) + len(orphans) == PUSH_BATCH_SIZE
+
+
+def _purge_finished(db, PushOutbox):
+    now = get_korean_time_for_db()
+    PushOutbox.query.filter(db.or_(
+        db.and_(PushOutbox.status == 'sent', PushOutbox.sent_at <= now - PUSH_RATE_WINDOW),
+        db.and_(PushOutbox.status == 'failed', PushOutbox.created_at <= now - FAILED_RETENTION)
+    )).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def outbox_stats():
+    """대기열 깊이(상태별 개수, 가장 오래된 대기 작업의 나이)와 이 프로세스의 전송 통계"""
+    from extensions import db
+    from models import PushOutbox
+
+    depth = dict(db.session.query(PushOutbox.status, db.func.count(PushOutbox.id)).group_by(PushOutbox.status).all())
+    oldest = db.session.query(db.func.min(PushOutbox.created_at)).filter(PushOutbox.status.in_(('pending', 'sending'))).scalar()
+    stats = {
+        'queue_depth': {status: depth.get(status, 0) for status in ('pending', 'sending', 'sent', 'failed')},
+        'oldest_pending_age': round((get_korean_time_for_db() - oldest).total_seconds(), 1) if oldest else None,
+    }
+    stats.update(push_metrics.snapshot())
+    return stats
+
+
+push_dispatcher = BackgroundWorker('push-dispatcher', dispatch_push_outbox, interval=10)
@@ -0,0 +1,73 @@
+from sqlalchemy import inspect, text
+
+
+def upgrade_schema(db):
+    """
+    db.create_all()은 이미 존재하는 테이블에 새 컬럼/인덱스를 추가하지 않으므로,
+    모델에 새로 정의된 컬럼과 인덱스를 기존 DB에 보충합니다. (가벼운 마이그레이션)
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {col['name'] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if default is not None:
+                    ddl += f" DEFAULT {int(default) if isinstance(default, bool) else repr(default)}"
+                conn.execute(text(ddl))
+                print(f"[Schema] 컬럼 추가: {table.name}.{column.name}")
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def migrate_post_json_columns(db):
+    """
+    레거시 Post.files / Post.url_previews JSON 문자열을 PostAttachment / PostUrlPreview 행으로 이전합니다.
+    이전이 끝난 게시글은 JSON 컬럼을 '[]'로 비워 두므로 여러 번 실행해도 안전합니다.
+    """
+    import json
+    from models import Post, PostAttachment, PostUrlPreview
+
+    empty = ('', '[]')
+    legacy_posts = Post.query.filter(
+        db.or_(Post.files.notin_(empty), Post.url_previews.notin_(empty))
+    ).all()
+    if not legacy_posts:
+        return 0
+
+    for post in legacy_posts:
+        try:
+            files = json.loads(post.files) if post.files else []
+            previews = json.loads(post.url_previews) if post.url_previews else []
+        except (TypeError, ValueError) as e:
+            print(f"[Schema] 게시글 {post.id} JSON 파싱 오류, 건너뜀: {e}")
+            continue
+
+        for position, file_info in enumerate(files):
+            if file_info.get('id'):
+                post.attachments.append(PostAttachment.from_upload(file_info, position=position))
+        for position, preview in enumerate(previews):
+            if preview.get('url'):
+                post.link_previews.append(PostUrlPreview.from_preview(preview, position=position))
+
+        # updated_at을 그대로 유지한 채 레거시 컬럼만 비움
+        db.session.execute(
+            db.update(Post).where(Post.id == post.id)
+            .values(files='[]', url_previews='[]', updated_at=post.updated_at)
+        )
+
+    db.session.commit()
+    print(f"[Schema] 게시글 {len(legacy_posts)}개의 첨부 파일/미리보기를 테이블로 이전했습니다.")
+    return len(legacy_posts)
@@ -0,0 +1,175 @@
+import re
+from sqlalchemy import event, text
+
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def bigrams(value):
+    """
+    문자 단위 2-gram 토큰 목록 생성.
+    한국어는 공백 단위 토큰화로는 조사/어미 때문에 부분 일치가 되지 않으므로
+    '안녕하세요' → ['안녕', '녕하', '하세', '세요'] 처럼 인접한 두 글자씩 잘라 색인합니다.
+    """
+    tokens = []
+    for word in WORD_PATTERN.findall((value or '').lower()):
+        if len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def to_match_query(query):
+    """
+    검색어를 FTS5 MATCH 식으로 변환.
+    단어마다 2-gram을 연속 구문("ab bc cd")으로 묶어 부분 문자열 일치가 되도록 하고, 단어끼리는 AND로 결합합니다.
+    """
+    clauses = []
+    for word in WORD_PATTERN.findall((query or '').lower()):
+        if len(word) == 1:
+            clauses.append(f'"{word}"*')
+        else:
+            clauses.append('"' + ' '.join(bigrams(word)) + '"')
+    return ' AND '.join(clauses)
+
+
+def escape_like(value):
+    """LIKE/ILIKE 패턴에서 검색어의 %, _ 가 와일드카드로 해석되지 않도록 이스케이프 (ESCAPE '\\'와 함께 사용)"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class PostSearchIndex:
+    """
+    게시글 전문 검색 색인.
+    SQLite에서는 2-gram 토큰을 담은 FTS5 가상 테이블(post_fts, rowid = post.id)을 사용하고,
+    DATABASE_URL로 PostgreSQL을 사용할 때는 pg_trgm GIN 인덱스 + similarity 순위로 대체합니다.
+    """
+
+    def __init__(self):
+        self.db = None
+        self._events_registered = False
+        self._trgm_available = False
+
+    @property
+    def dialect(self):
+        return self.db.engine.dialect.name
+
+    def init_app(self, app, db):
+        self.db = db
+        with app.app_context():
+            if self.dialect == 'sqlite':
+                self._setup_sqlite()
+            elif self.dialect == 'postgresql':
+                self._setup_postgres()
+        self._register_events()
+
+    def _setup_sqlite(self):
+        with self.db.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(body, tokenize='unicode61')"
+            ))
+            indexed = conn.execute(text("SELECT count(*) FROM post_fts")).scalar()
+            total = conn.execute(text("SELECT count(*) FROM post")).scalar()
+        if indexed != total:
+            self.rebuild()
+
+    def _setup_postgres(self):
+        try:
+            with self.db.engine.begin() as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_post_content_trgm ON post USING gin (content gin_trgm_ops)"
+                ))
+            self._trgm_available = True
+        except Exception as e:
+            print(f"[Search] pg_trgm 인덱스 생성 실패 (순위 없이 ILIKE 검색으로 동작): {e}")
+
+    def rebuild(self):
+        """게시글 전체를 다시 색인 (SQLite 전용)"""
+        with self.db.engine.begin() as conn:
+            conn.execute(text("DELETE FROM post_fts"))
+            rows = conn.execute(text(
+                'SELECT post.id, post.content, "user".username FROM post JOIN "user" ON "user".id = post.author_id'
+            )).fetchall()
+            if rows:
+                conn.execute(
+                    text("INSERT INTO post_fts (rowid, body) VALUES (:id, :body)"),
+                    [{'id': row[0], 'body': self._document(row[1], row[2])} for row in rows]
+                )
+        print(f"[Search] 게시글 {len(rows)}개를 전문 검색 색인에 등록했습니다.")
+
+    @staticmethod
+    def _document(content, username):
+        return ' '.join(bigrams(content) + bigrams(username))
+
+    # --- 색인 유지 (Post insert/update/delete 시 같은 트랜잭션에서 반영) ---
+
+    def _register_events(self):
+        if self._events_registered:
+            return
+        from models import Post
+
+        def upsert(connection, target):
+            username = connection.execute(
+                text('SELECT username FROM "user" WHERE id = :id'), {'id': target.author_id}
+            ).scalar()
+            connection.execute(text("DELETE FROM post_fts WHERE rowid = :id"), {'id': target.id})
+            connection.execute(
+                text("INSERT INTO post_fts (rowid, body) VALUES (:id, :body)"),
+                {'id': target.id, 'body': self._document(target.content, username)}
+            )
+
+        @event.listens_for(Post, 'after_insert')
+        def _after_insert(mapper, connection, target):
+            if connection.dialect.name == 'sqlite':
+                upsert(connection, target)
+
+        @event.listens_for(Post, 'after_update')
+        def _after_update(mapper, connection, target):
+            if connection.dialect.name == 'sqlite' and self.db.inspect(target).attrs.content.history.has_changes():
+                upsert(connection, target)
+
+        @event.listens_for(Post, 'after_delete')
+        def _after_delete(mapper, connection, target):
+            if connection.dialect.name == 'sqlite':
+                connection.execute(text("DELETE FROM post_fts WHERE rowid = :id"), {'id': target.id})
+
+        self._events_registered = True
+
+    # --- 검색 ---
+
+    def search_post_ids(self, query, page=1, per_page=20):
+        """
+        공개 게시글 중 검색어와 일치하는 게시글 ID를 관련도 순으로 반환.
+        다음 페이지 여부는 per_page + 1개를 조회해 판단합니다.
+        반환값: (post_ids, has_next)
+        """
+        offset = (max(page, 1) - 1) * per_page
+        params = {'limit': per_page + 1, 'offset': offset}
+
+        if self.dialect == 'sqlite':
+            match = to_match_query(query)
+            if not match:
+                return [], False
+            params['match'] = match
+            sql = (
+                "SELECT post.id FROM post_fts JOIN post ON post.id = post_fts.rowid "
+                "WHERE post_fts MATCH :match AND post.is_public = 1 "
+                "ORDER BY bm25(post_fts), post.created_at DESC LIMIT :limit OFFSET :offset"
+            )
+        else:
+            # PostgreSQL: ILIKE가 pg_trgm GIN 인덱스를 사용하고 similarity로 순위 결정
+            params.update({'q': query, 'pattern': f'%{escape_like(query)}%'})
+            rank = "similarity(post.content, :q) DESC, " if self._trgm_available else ""
+            sql = (
+                'SELECT post.id FROM post JOIN "user" ON "user".id = post.author_id '
+                "WHERE post.is_public AND (post.content ILIKE :pattern ESCAPE '\\' "
+                "OR \"user\".username ILIKE :pattern ESCAPE '\\') "
+                f"ORDER BY {rank}post.created_at DESC LIMIT :limit OFFSET :offset"
+            )
+
+        ids = [row[0] for row in self.db.session.execute(text(sql), params)]
+        return ids[:per_page], len(ids) > per_page
+
+
+search_index = PostSearchIndex()
@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+
+MISSING = object()
+
+
+def default_cache_path():
+    """sns.db와 같은 위치의 cache.db (SHARED_CACHE_PATH 환경 변수로 변경 가능)"""
+    if os.environ.get('SHARED_CACHE_PATH'):
+        return os.environ['SHARED_CACHE_PATH']
+    if getattr(sys, 'frozen', False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, 'cache.db')
+
+
+class SharedTTLCache:
+    """
+    같은 호스트의 모든 gunicorn 워커가 공유하는 SQLite 파일 기반 캐시.
+    항목마다 만료 시각(TTL)을 가지며, namespace별 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다(LRU).
+    값은 JSON으로 저장되며 None도 저장할 수 있어 실패 결과를 짧게 기억하는 네거티브 캐시로 쓸 수 있습니다.
+    """
+
+    # 읽을 때마다 last_access를 쓰지 않도록, 이 시간(초)이 지난 경우에만 갱신
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, namespace, max_entries=2000, path=None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.path = path or default_cache_path()
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute(
+                        'CREATE TABLE IF NOT EXISTS cache_entries ('
+                        ' namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT,'
+                        ' expires_at REAL NOT NULL, last_access REAL NOT NULL,'
+                        ' PRIMARY KEY (namespace, key))'
+                    )
+                    conn.execute(
+                        'CREATE INDEX IF NOT EXISTS ix_cache_entries_lru ON cache_entries (namespace, last_access)'
+                    )
+                    self._schema_ready = True
+        return conn
+
+    def get(self, key, default=MISSING):
+        """저장된 값을 반환. 없거나 만료되었으면 default (기본값은 MISSING)"""
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT value, expires_at, last_access FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                return default
+            value, expires_at, last_access = row
+            now = time.time()
+            if expires_at <= now:
+                conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (self.namespace, key))
+                return default
+            if now - last_access > self.TOUCH_INTERVAL:
+                conn.execute(
+                    'UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?',
+                    (now, self.namespace, key)
+                )
+            return json.loads(value)
+        except sqlite3.Error as e:
+            print(f"[Cache] 조회 오류 ({self.namespace}): {e}")
+            return default
+
+    def get_many(self, keys):
+        """여러 키를 한 번의 조회로 가져옴. 반환값: 만료되지 않은 항목의 {key: value}"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            conn = self._connect()
+            now = time.time()
+            rows = conn.execute(
+                f'SELECT key, value, last_access FROM cache_entries WHERE namespace = ? AND expires_at > ?'
+                f' AND key IN ({", ".join("?" for _ in keys)})',
+                [self.namespace, now] + keys
+            ).fetchall()
+            stale = [key for key, _, last_access in rows if now - last_access > self.TOUCH_INTERVAL]
+            if stale:
+                conn.execute(
+                    f'UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key IN ({", ".join("?" for _ in stale)})',
+                    [now, self.namespace] + stale
+                )
+            return {key: json.loads(value) for key, value, _ in rows}
+        except sqlite3.Error as e:
+            print(f"[Cache] 조회 오류 ({self.namespace}): {e}")
+            return {}
+
+    def set(self, key, value, ttl):
+        try:
+            conn = self._connect()
+            now = time.time()
+            conn.execute(
+                'INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, last_access) VALUES (?, ?, ?, ?, ?)',
+                (self.namespace, key, json.dumps(value, ensure_ascii=False), now + ttl, now)
+            )
+            self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"[Cache] 저장 오류 ({self.namespace}): {e}")
+
+    def delete(self, key):
+        try:
+            self._connect().execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (self.namespace, key)
+            )
+        except sqlite3.Error as e:
+            print(f"[Cache] 삭제 오류 ({self.namespace}): {e}")
+
+    def _evict(self, conn):
+        count = conn.execute(
+            'SELECT count(*) FROM cache_entries WHERE namespace = ?', (self.namespace,)
+        ).fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # 만료된 항목을 먼저 지우고, 그래도 넘치면 오래 사용되지 않은 순서로 제거
+        conn.execute(
+            'DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?', (self.namespace, time.time())
+        )
+        conn.execute(
+            'DELETE FROM cache_entries WHERE namespace = ? AND key IN ('
+            ' SELECT key FROM cache_entries WHERE namespace = ? ORDER BY last_access ASC LIMIT'
+            ' max(0, (SELECT count(*) FROM cache_entries WHERE namespace = ?) - ?))',
+            (self.namespace, self.namespace, self.namespace, self.max_entries)
+        )
+
+    def __len__(self):
+        return self._connect().execute(
+            'SELECT count(*) FROM cache_entries WHERE namespace = ?', (self.namespace,)
+        ).fetchone()[0]
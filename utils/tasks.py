@@ -1,21 +1,163 @@
 import os
+import time
+import atexit
 import threading
-from utils.google_drive_utils import drive_manager
+from utils.google_drive_utils import drive_manager, SYNC_BUSY
 
 # global db_path will be set by app.py
 DB_PATH = None
 
+DB_SYNC_DEBOUNCE = float(os.environ.get('DB_SYNC_DEBOUNCE', 5))            # 마지막 쓰기 후 이 시간(초) 동안 조용하면 업로드
+DB_SYNC_MAX_STALENESS = float(os.environ.get('DB_SYNC_MAX_STALENESS', 60))  # 쓰기가 계속되어도 첫 변경 후 이 시간 안에는 업로드
+DB_SYNC_RETRY_DELAY = 30                                                    # 업로드 실패 후 첫 재시도까지 대기(초), 연속 실패 시 2배씩 증가
+DB_SYNC_MAX_RETRY_DELAY = 600
+
 def set_db_path(path):
     global DB_PATH
     DB_PATH = path
 
 def scheduled_db_sync_task():
-    try: 
-        if DB_PATH and not os.environ.get('DATABASE_URL'): 
-            drive_manager.sync_database(DB_PATH)
-    except Exception as e: 
+    try:
+        if DB_PATH and not os.environ.get('DATABASE_URL'):
+            result = drive_manager.sync_database(DB_PATH)
+            return SYNC_BUSY if result == SYNC_BUSY else result is not None
+    except Exception as e:
         print(f"Sync Error: {e}")
+    return False
+
+
+class DatabaseSyncWorker:
+    """
+    DB 파일을 드라이브에 올리는 단일 백그라운드 스레드.
+    쓰기가 일어나면 dirty 표시만 하고, 마지막 쓰기 후 debounce초 동안 추가 쓰기가 없거나
+    첫 변경 후 max_staleness초가 지나면 한 번만 업로드합니다.
+    따라서 짧은 시간의 쓰기 N번은 업로드 한 번으로 합쳐지고, 업로드가 서로 겹치지 않습니다.
+    다른 프로세스가 동기화 중이라 sync_func가 SYNC_BUSY를 반환하면 실패로 세지 않고 retry_delay 뒤에 다시 시도합니다.
+    """
+
+    def __init__(self, sync_func, debounce=5, max_staleness=60, retry_delay=30, max_retry_delay=600):
+        self.sync_func = sync_func
+        self.debounce = debounce
+        self.max_staleness = max_staleness
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._consecutive_failures = 0
+        self._cond = threading.Condition()
+        self._dirty_since = None   # 아직 업로드되지 않은 첫 변경 시각
+        self._last_write = None
+        self._pending_writes = 0
+        self._thread = None
+        self._syncing = False
+        self.metrics = {
+            'syncs': 0, 'failures': 0, 'busy': 0, 'writes': 0,
+            'last_sync_at': None, 'last_duration': None, 'last_lag': None, 'max_lag': 0.0,
+            'last_coalesced_writes': 0
+        }
+
+    def mark_dirty(self):
+        with self._cond:
+            now = time.time()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            self._last_write = now
+            self._pending_writes += 1
+            self.metrics['writes'] += 1
+            self._ensure_started()
+            self._cond.notify()
+
+    def _ensure_started(self):
+        # gunicorn 워커처럼 fork된 프로세스에서도 첫 쓰기 때 스레드를 만들도록 지연 시작
+        if self._thread is None or not self._thread.is_alive():
+            if self._thread is None:
+                atexit.register(self.flush)
+            self._thread = threading.Thread(target=self._run, name='db-sync', daemon=True)
+            self._thread.start()
+
+    def _due_at(self):
+        return min(self._last_write + self.debounce, self._dirty_since + self.max_staleness)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._dirty_since is None or time.time() < self._due_at():
+                    timeout = None if self._dirty_since is None else max(self._due_at() - time.time(), 0)
+                    self._cond.wait(timeout)
+                dirty_since, writes = self._take_pending()
+            result = self._sync(dirty_since, writes)
+            if result == SYNC_BUSY:
+                time.sleep(self.retry_delay)
+            elif not result:
+                delay = self.retry_delay * (2 ** (self._consecutive_failures - 1))
+                time.sleep(min(delay, self.max_retry_delay))
+
+    def _take_pending(self):
+        dirty_since, writes = self._dirty_since, self._pending_writes
+        self._dirty_since, self._pending_writes = None, 0
+        self._syncing = True
+        return dirty_since, writes
+
+    def _sync(self, dirty_since, writes):
+        started = time.time()
+        try:
+            result = self.sync_func()
+        except Exception as e:
+            print(f"Sync Error: {e}")
+            result = False
+        finished = time.time()
+        with self._cond:
+            self._syncing = False
+            if result == SYNC_BUSY or not result:
+                if result == SYNC_BUSY:
+                    self.metrics['busy'] += 1
+                else:
+                    self.metrics['failures'] += 1
+                    self._consecutive_failures += 1
+                # 올리지 못한 변경은 다시 dirty로 되돌려 다음 업로드에 포함
+                self._dirty_since = min(dirty_since, self._dirty_since or dirty_since)
+                self._last_write = max(self._last_write or 0, dirty_since)
+                self._pending_writes += writes
+                return result or False
+            self._consecutive_failures = 0
+            lag = finished - dirty_since
+            self.metrics.update({
+                'syncs': self.metrics['syncs'] + 1,
+                'last_sync_at': finished,
+                'last_duration': round(finished - started, 3),
+                'last_lag': round(lag, 3),
+                'max_lag': round(max(self.metrics['max_lag'], lag), 3),
+                'last_coalesced_writes': writes
+            })
+        return True
+
+    def flush(self):
+        """종료 직전에 아직 올리지 못한 변경을 바로 업로드"""
+        with self._cond:
+            if self._dirty_since is None or self._syncing:
+                return
+            dirty_since, writes = self._take_pending()
+        self._sync(dirty_since, writes)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self.metrics)
+            stats.update({
+                'dirty': self._dirty_since is not None,
+                'pending_writes': self._pending_writes,
+                'current_lag': round(time.time() - self._dirty_since, 3) if self._dirty_since else 0.0,
+                'syncing': self._syncing
+            })
+        return stats
+
+
+db_sync_worker = DatabaseSyncWorker(
+    scheduled_db_sync_task,
+    debounce=DB_SYNC_DEBOUNCE,
+    max_staleness=DB_SYNC_MAX_STALENESS,
+    retry_delay=DB_SYNC_RETRY_DELAY,
+    max_retry_delay=DB_SYNC_MAX_RETRY_DELAY
+)
 
 def trigger_db_sync():
-    if not os.environ.get('DATABASE_URL'): 
-        threading.Thread(target=scheduled_db_sync_task).start()
+    """DB가 변경되었음을 알림 (실제 업로드는 db_sync_worker가 모아서 한 번에 수행)"""
+    if not os.environ.get('DATABASE_URL'):
+        db_sync_worker.mark_dirty()
@@ -0,0 +1,88 @@
+import os
+import threading
+from utils.background import BackgroundWorker
+from utils.shared_cache import SharedTTLCache, MISSING
+from utils.google_drive_utils import drive_manager
+
+# 드라이브 thumbnailLink는 몇 시간 뒤 만료되므로 그보다 짧게 보관
+THUMBNAIL_LINK_TTL = int(os.environ.get('THUMBNAIL_LINK_TTL', 3600))
+# 방금 업로드되어 아직 썸네일이 없는 파일은 잠시 후 다시 확인
+THUMBNAIL_MISSING_TTL = 60
+
+
+def sized_link(thumbnail_link, size=1000):
+    """썸네일 링크의 해상도 조절 (기본값은 작으므로 s1000으로 확장)"""
+    if '=s' in thumbnail_link:
+        return thumbnail_link.split('=s')[0] + f'=s{size}'
+    return thumbnail_link + f'=s{size}'
+
+
+class ThumbnailLinkCache:
+    """
+    드라이브 파일 ID → thumbnailLink 캐시.
+    모든 gunicorn 워커가 공유하는 SharedTTLCache에 저장하므로 같은 이미지를 여러 번 보여줘도
+    링크가 만료되기 전까지는 드라이브 API를 다시 호출하지 않습니다.
+    """
+
+    def __init__(self, ttl=THUMBNAIL_LINK_TTL, missing_ttl=THUMBNAIL_MISSING_TTL, max_entries=5000):
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self.cache = SharedTTLCache('drive_thumbnail', max_entries=max_entries)
+
+    def _store(self, links):
+        for file_id, link in links.items():
+            self.cache.set(file_id, link, self.ttl if link else self.missing_ttl)
+
+    def get(self, file_id):
+        """썸네일 링크 반환 (없으면 None). 캐시에 없을 때만 드라이브에 조회"""
+        link = self.cache.get(file_id)
+        if link is MISSING:
+            links = drive_manager.get_thumbnail_links([file_id])
+            self._store(links)
+            link = links.get(file_id)
+        return link
+
+    def prefetch(self, file_ids):
+        """
+        페이지에 표시될 이미지들의 링크 중 캐시에 없는 것만 드라이브 배치 요청 한 번으로 미리 가져옴.
+        이후 브라우저가 보내는 /file/thumbnail 요청은 모두 캐시에서 처리됩니다.
+        드라이브 왕복이 있으므로 요청 스레드에서는 prefetch_async를 사용합니다.
+        """
+        file_ids = list(dict.fromkeys(file_ids))
+        if not file_ids:
+            return
+        cached = self.cache.get_many(file_ids)
+        missing = [file_id for file_id in file_ids if file_id not in cached]
+        if missing:
+            try:
+                self._store(drive_manager.get_thumbnail_links(missing))
+            except Exception as e:
+                print(f"썸네일 링크 미리 가져오기 오류: {e}")
+
+
+thumbnail_links = ThumbnailLinkCache()
+
+_queued_file_ids = set()
+_queue_lock = threading.Lock()
+
+
+def prefetch_async(file_ids):
+    """링크 미리 가져오기를 백그라운드 워커에 맡김 (페이지 렌더링이 드라이브 응답을 기다리지 않음)"""
+    file_ids = [file_id for file_id in file_ids if file_id]
+    if not file_ids:
+        return
+    with _queue_lock:
+        _queued_file_ids.update(file_ids)
+    thumbnail_prefetcher.wake()
+
+
+def _prefetch_queued():
+    with _queue_lock:
+        file_ids = list(_queued_file_ids)
+        _queued_file_ids.clear()
+    if file_ids:
+        thumbnail_links.prefetch(file_ids)
+    return False
+
+
+thumbnail_prefetcher = BackgroundWorker('thumbnail-prefetch', _prefetch_queued, interval=300)
@@ -0,0 +1,213 @@
+import io
+import os
+import re
+import sys
+import time
+import threading
+from flask import url_for
+from utils.background import BackgroundWorker
+from utils.http_client import http_client
+from utils.image_pipeline import FORMATS, open_image, resize_to, encode, write_atomic
+from utils.thumbnail_links import thumbnail_links, sized_link
+
+THUMBNAIL_WIDTHS = (320, 640, 1080)
+THUMBNAIL_MAX_BYTES = int(os.environ.get('THUMBNAIL_STORE_MAX_MB', 500)) * 1024 * 1024
+THUMBNAIL_CACHE_MAX_AGE = 365 * 24 * 3600   # 파일 ID별 이미지는 바뀌지 않으므로 1년 동안 브라우저 캐시
+THUMBNAIL_EVICT_INTERVAL = 3600   # 다른 워커가 쓴 파일까지 반영해 저장소 크기를 다시 확인하는 주기(초)
+SOURCE_MAX_BYTES = 20 * 1024 * 1024
+
+# 드라이브 파일 ID 형식만 허용 (경로 조작 방지)
+FILE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{10,128}$')
+
+
+def default_store_path():
+    """sns.db와 같은 위치의 thumbnails 폴더 (THUMBNAIL_STORE_PATH 환경 변수로 변경 가능)"""
+    if os.environ.get('THUMBNAIL_STORE_PATH'):
+        return os.environ['THUMBNAIL_STORE_PATH']
+    if getattr(sys, 'frozen', False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, 'thumbnails')
+
+
+class ThumbnailStore:
+    """
+    드라이브 이미지를 한 번만 내려받아 여러 너비의 WebP/JPEG 썸네일로 로컬 디스크에 저장하는 저장소.
+    같은 파일 ID의 이미지는 바뀌지 않으므로 저장된 썸네일은 ETag와 immutable 캐시 헤더로 제공할 수 있습니다.
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 이미지부터 모든 변형을 함께 지웁니다(LRU).
+    저장소 전체를 훑는 정리는 요청 스레드가 아닌 thumbnail_evictor에서 실행하며,
+    그 사이에는 마지막 확인 크기에 이 프로세스가 새로 쓴 크기를 더해 정리가 필요한지 판단합니다.
+    """
+
+    # 읽을 때마다 mtime을 쓰지 않도록, 이 시간(초)이 지난 경우에만 사용 시각 갱신
+    TOUCH_INTERVAL = 3600
+
+    def __init__(self, root=None, widths=THUMBNAIL_WIDTHS, max_bytes=THUMBNAIL_MAX_BYTES):
+        self.root = root or default_store_path()
+        self.widths = tuple(sorted(widths))
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._generating = {}   # 파일 ID → 생성 중 이벤트 (같은 워커의 동시 요청이 한 번만 내려받도록)
+        self._known_bytes = None   # 마지막 정리 때의 전체 크기 + 이후 이 프로세스가 쓴 크기 (아직 모르면 None)
+        self.metrics = {'hits': 0, 'generated': 0, 'failures': 0, 'evicted': 0}
+
+    @staticmethod
+    def valid_id(file_id):
+        return bool(FILE_ID_PATTERN.match(file_id or ''))
+
+    def pick_width(self, requested):
+        """요청한 너비 이상인 가장 작은 변형 너비 (없으면 가장 큰 너비)"""
+        for width in self.widths:
+            if requested and width >= requested:
+                return width
+        return self.widths[-1]
+
+    def path(self, file_id, width, fmt):
+        return os.path.join(self.root, file_id[:2], f'{file_id}-{width}.{fmt}')
+
+    def has(self, file_id):
+        """이미 저장소에 변형이 만들어진 이미지인지 (드라이브 링크가 필요 없음)"""
+        return os.path.exists(self.path(file_id, self.widths[-1], 'webp'))
+
+    def get(self, file_id, width, fmt):
+        """
+        썸네일 파일 경로 반환. 저장소에 없으면 드라이브에서 원본을 한 번 받아 모든 변형을 만든 뒤 반환합니다.
+        썸네일을 만들 수 없으면(링크 없음, 다운로드 실패 등) None.
+        """
+        path = self.path(file_id, width, fmt)
+        if self._touch(path):
+            self.metrics['hits'] += 1
+            return path
+
+        with self._lock:
+            event = self._generating.get(file_id)
+            owner = event is None
+            if owner:
+                event = self._generating[file_id] = threading.Event()
+        if not owner:
+            event.wait(30)
+            return path if os.path.exists(path) else None
+
+        try:
+            if not os.path.exists(path):
+                self._generate(file_id)
+        except Exception as e:
+            self.metrics['failures'] += 1
+            print(f"썸네일 생성 오류 ({file_id}): {e}")
+        finally:
+            with self._lock:
+                self._generating.pop(file_id, None)
+            event.set()
+        return path if os.path.exists(path) else None
+
+    def _touch(self, path):
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return False
+        now = time.time()
+        if now - mtime > self.TOUCH_INTERVAL:
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+        return True
+
+    def _generate(self, file_id):
+        link = thumbnail_links.get(file_id)
+        if not link:
+            return False
+        # 가장 큰 변형 너비로 한 번만 내려받음
+        response = http_client.get(sized_link(link, self.widths[-1]), stream=True)
+        with response:
+            response.raise_for_status()
+            data = response.raw.read(SOURCE_MAX_BYTES + 1, decode_content=True)
+        if len(data) > SOURCE_MAX_BYTES:
+            raise ValueError('원본 이미지가 너무 큽니다')
+        self.note_written(self.save_variants(file_id, data))
+        self.metrics['generated'] += 1
+        return True
+
+    def save_variants(self, file_id, data):
+        """원본 이미지 바이트로 모든 너비/형식의 썸네일을 만들어 저장하고 쓴 바이트 수를 반환"""
+        image, _, _ = open_image(io.BytesIO(data))
+        os.makedirs(os.path.join(self.root, file_id[:2]), exist_ok=True)
+        written = 0
+        for width in self.widths:
+            resized = resize_to(image, width)
+            for fmt in FORMATS:
+                written += write_atomic(self.path(file_id, width, fmt), encode(resized, fmt))
+        return written
+
+    def note_written(self, nbytes):
+        """새로 쓴 크기를 더해 max_bytes를 넘었으면(또는 아직 크기를 모르면) 백그라운드 정리를 깨움"""
+        with self._lock:
+            if self._known_bytes is not None:
+                self._known_bytes += nbytes
+            over = self._known_bytes is None or self._known_bytes > self.max_bytes
+        if over:
+            thumbnail_evictor.wake()
+
+    def evict(self):
+        """저장소가 max_bytes를 넘으면 가장 오래 사용되지 않은 이미지부터 max_bytes의 90%까지 정리"""
+        groups = {}
+        total = 0
+        for directory in os.scandir(self.root):
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                file_id = entry.name.rsplit('-', 1)[0]
+                size, last_used, paths = groups.get(file_id, (0, 0, []))
+                paths.append(entry.path)
+                groups[file_id] = (size + stat.st_size, max(last_used, stat.st_mtime), paths)
+                total += stat.st_size
+        if total <= self.max_bytes:
+            self._known_bytes = total
+            return 0
+        target = self.max_bytes * 0.9
+        removed = 0
+        for file_id, (size, _, paths) in sorted(groups.items(), key=lambda item: item[1][1]):
+            if total <= target:
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed += 1
+        self._known_bytes = total
+        self.metrics['evicted'] += removed
+        print(f"[Thumbnail] 저장소 정리: 이미지 {removed}개 삭제")
+        return removed
+
+    def etag(self, path):
+        stat = os.stat(path)
+        return f'{os.path.basename(path)}-{stat.st_size}'
+
+    def srcset(self, file_id):
+        """<img srcset>에 넣을 너비별 썸네일 URL 목록"""
+        return ', '.join(
+            f"{url_for('main.get_thumbnail', file_id=file_id, w=width)} {width}w" for width in self.widths
+        )
+
+
+thumbnail_store = ThumbnailStore()
+
+
+def _evict_store():
+    if os.path.isdir(thumbnail_store.root):
+        thumbnail_store.evict()
+    return False
+
+
+thumbnail_evictor = BackgroundWorker('thumbnail-evict', _evict_store, interval=THUMBNAIL_EVICT_INTERVAL)
+
+
+def thumbnail_srcset(file_id):
+    return thumbnail_store.srcset(file_id)
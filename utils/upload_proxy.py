@@ -0,0 +1,159 @@
+import os
+import re
+import secrets
+from utils.http_client import http_client
+from utils.shared_cache import SharedTTLCache
+
+# 'fallback': 브라우저 → 드라이브 직접 업로드가 막혔을 때만 사용, 'always': 항상 서버 경유, 'off': 사용 안 함
+UPLOAD_PROXY_MODE = os.environ.get('UPLOAD_PROXY_MODE', 'fallback')
+# 드라이브로 한 번에 보낼 크기 (드라이브 규칙상 마지막 조각이 아니면 256KiB의 배수여야 함)
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_PROXY_CHUNK_MB', 8)) * 1024 * 1024
+# 브라우저가 요청 하나로 보낼 구간 크기 (gunicorn 요청 시간 제한 안에 끝나도록 파일을 나누어 전송)
+UPLOAD_SEGMENT_SIZE = int(os.environ.get('UPLOAD_PROXY_SEGMENT_MB', 64)) * 1024 * 1024
+DRIVE_CHUNK_UNIT = 256 * 1024
+UPLOAD_SESSION_TTL = 6 * 24 * 3600   # 드라이브 재개 가능 세션은 1주일 동안 유효
+UPLOAD_TIMEOUT = (10, 120)
+
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadSessionError(Exception):
+    """세션이 만료되었거나 드라이브가 요청을 거부한 경우 (재개 불가)"""
+
+
+class UploadTransientError(Exception):
+    """드라이브의 일시적인 오류 (저장된 위치를 다시 조회해 이어서 보내면 됨)"""
+
+
+class UploadOffsetMismatch(Exception):
+    """보낸 구간의 시작이 드라이브에 저장된 위치와 다른 경우 (offset부터 다시 보내야 함)"""
+
+    def __init__(self, offset):
+        super().__init__(f'드라이브에 저장된 위치는 {offset}입니다')
+        self.offset = offset
+
+
+def parse_content_range(value):
+    """'bytes 시작-끝/전체' → (시작, 끝, 전체), 형식이 틀리면 None"""
+    match = CONTENT_RANGE_PATTERN.match(value or '')
+    if not match:
+        return None
+    start, end, total = (int(group) for group in match.groups())
+    if start > end or end >= total:
+        return None
+    return start, end, total
+
+
+class ResumableUploadProxy:
+    """
+    브라우저가 googleapis.com에 직접 접근할 수 없을 때(CORS, 회사 프록시 등) 서버를 거쳐 드라이브로 올리는 중계기.
+    요청 본문을 고정 크기 조각으로 읽어 Content-Range와 함께 드라이브 재개 가능 세션으로 바로 전달하므로
+    파일 전체를 메모리나 디스크에 쌓지 않고, 한 번에 조각 하나 크기의 메모리만 사용합니다.
+    연결이 끊기면 드라이브에 저장된 위치를 조회해 그 지점부터 이어서 보낼 수 있습니다.
+    """
+
+    def __init__(self, chunk_size=UPLOAD_CHUNK_SIZE, timeout=UPLOAD_TIMEOUT, client=http_client):
+        if chunk_size % DRIVE_CHUNK_UNIT:
+            raise ValueError('chunk_size는 256KiB의 배수여야 합니다')
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.client = client
+        self.sessions = SharedTTLCache('upload_session', max_entries=1000)
+
+    def register(self, session_uri, user_id):
+        """드라이브 세션 URI를 서버에만 보관하고 브라우저에는 추측할 수 없는 업로드 ID를 돌려줌"""
+        upload_id = secrets.token_urlsafe(24)
+        self.sessions.set(upload_id, {'uri': session_uri, 'user_id': user_id}, UPLOAD_SESSION_TTL)
+        return upload_id
+
+    def session_uri(self, upload_id, user_id):
+        session = self.sessions.get(upload_id, None)
+        if not session or session['user_id'] != user_id:
+            return None
+        return session['uri']
+
+    def query(self, session_uri, total):
+        """
+        드라이브에 저장된 위치 조회.
+        반환값: ('incomplete', 다음에 보낼 위치) 또는 ('complete', 파일 정보)
+        """
+        response = self.client.put(
+            session_uri, data=b'', headers={'Content-Range': f'bytes */{total}'}, timeout=self.timeout
+        )
+        return self._result(response)
+
+    def forward(self, stream, session_uri, start, end, total):
+        """
+        stream에서 start~end 구간(end 포함)을 읽어 조각 단위로 드라이브에 전달.
+        반환값: ('incomplete', 다음에 보낼 위치) 또는 ('complete', 파일 정보)
+        브라우저 연결이 중간에 끊기면 받은 만큼(256KiB 단위)만 저장하고 그 위치를 반환합니다.
+        """
+        offset = start
+        while offset <= end:
+            chunk = self._read(stream, min(self.chunk_size, end + 1 - offset))
+            last = offset + len(chunk) - 1 == total - 1
+            if len(chunk) < min(self.chunk_size, end + 1 - offset) and not last:
+                # 연결이 끊김: 드라이브 규칙에 맞게 256KiB 단위로 자른 부분까지만 저장
+                chunk = chunk[:len(chunk) - len(chunk) % DRIVE_CHUNK_UNIT]
+                if chunk:
+                    offset = self._send(session_uri, chunk, offset, total)
+                return 'incomplete', offset
+            offset = self._send(session_uri, chunk, offset, total)
+            if isinstance(offset, dict):
+                return 'complete', offset
+        return 'incomplete', offset
+
+    @staticmethod
+    def _read(stream, size):
+        """size 바이트를 채울 때까지 읽음 (연결이 끊기면 받은 만큼만 반환)"""
+        buffer = bytearray()
+        while len(buffer) < size:
+            try:
+                data = stream.read(size - len(buffer))
+            except Exception:
+                break
+            if not data:
+                break
+            buffer += data
+        return bytes(buffer)
+
+    def _send(self, session_uri, chunk, offset, total):
+        """
+        조각 하나를 보내고 다음 위치(또는 완료 시 파일 정보)를 반환.
+        드라이브가 조각의 일부만 저장했으면 메모리에 남아 있는 나머지를 다시 보냅니다.
+        """
+        position = offset
+        while True:
+            data = chunk[position - offset:]
+            response = self.client.put(
+                session_uri, data=data, timeout=self.timeout,
+                headers={'Content-Range': f'bytes {position}-{position + len(data) - 1}/{total}'}
+            )
+            status, value = self._result(response)
+            if status == 'complete':
+                return value
+            if value < offset or value > offset + len(chunk):
+                # 브라우저가 보낸 구간이 드라이브에 저장된 위치와 맞지 않음
+                raise UploadOffsetMismatch(value)
+            if value == offset + len(chunk):
+                return value
+            if value == position:
+                raise UploadTransientError('드라이브가 조각을 저장하지 않았습니다')
+            position = value
+
+    @staticmethod
+    def _result(response):
+        if response.status_code in (200, 201):
+            return 'complete', response.json()
+        if response.status_code == 308:
+            # Range: bytes=0-N → 다음에 보낼 위치는 N+1 (헤더가 없으면 아직 저장된 바이트 없음)
+            saved = response.headers.get('Range')
+            return 'incomplete', int(saved.rsplit('-', 1)[1]) + 1 if saved else 0
+        if response.status_code in (404, 410):
+            raise UploadSessionError('업로드 세션이 만료되었습니다')
+        if response.status_code in (408, 429) or response.status_code >= 500:
+            raise UploadTransientError(f'드라이브 업로드 오류 ({response.status_code})')
+        raise UploadSessionError(f'드라이브 업로드 오류 ({response.status_code})')
+
+
+upload_proxy = ResumableUploadProxy()
@@ -1,17 +1,146 @@
+import os
 import re
+import codecs
 import requests
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 from urllib.parse import urlparse, urljoin, parse_qs
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
 import time
 import json
+from utils.shared_cache import SharedTTLCache, MISSING
+from utils.http_client import http_client
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+HEADER_CHARSET_PATTERN = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+class HeadMetadataParser(HTMLParser):
+    """
+    미리보기에 필요한 태그(Open Graph, <title>, description, 첫 <p>/<img>)만 모으는 점진적 HTML 파서.
+    feed()로 받은 만큼만 처리하며, 더 읽을 필요가 없어지면 done이 True가 됩니다.
+    """
+    
+    OG_PROPERTIES = ('og:title', 'og:description', 'og:image', 'og:site_name')
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.og = {}
+        self.meta_description = None
+        self.title = None
+        self.first_p = None
+        self.first_img = None
+        self.head_closed = False
+        self._title_parts = None
+        self._p_parts = None
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'meta':
+            prop = attrs.get('property')
+            if prop in self.OG_PROPERTIES and prop not in self.og:
+                self.og[prop] = attrs.get('content')
+            elif attrs.get('name') == 'description' and self.meta_description is None:
+                self.meta_description = attrs.get('content') or ''
+        elif tag == 'title' and self.title is None and self._title_parts is None:
+            self._title_parts = []
+        elif tag == 'body':
+            self.head_closed = True
+        elif tag == 'p' and self.first_p is None and self._p_parts is None:
+            self._p_parts = []
+        elif tag == 'img' and self.first_img is None and attrs.get('src'):
+            self.first_img = attrs['src']
+    
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts)
+            self._title_parts = None
+        elif tag == 'head':
+            self.head_closed = True
+        elif tag == 'p' and self._p_parts is not None:
+            self.first_p = ''.join(self._p_parts)
+            self._p_parts = None
+    
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+        if self._p_parts is not None:
+            self._p_parts.append(data)
+    
+    @property
+    def done(self):
+        """<head>를 다 읽었고, 대체값이 필요한 항목(설명/이미지)은 본문에서 찾았으면 완료"""
+        if not self.head_closed:
+            return False
+        needs_description = not self.og.get('og:description') and not self.meta_description
+        needs_image = not self.og.get('og:image')
+        return (not needs_description or self.first_p is not None) and (not needs_image or self.first_img is not None)
+    
+    def close(self):
+        super().close()
+        # 닫히지 않은 채 잘린 태그의 텍스트도 사용
+        if self._title_parts is not None:
+            self.title = ''.join(self._title_parts)
+        if self._p_parts is not None:
+            self.first_p = ''.join(self._p_parts)
+    
+    def to_metadata(self, url: str, domain: str) -> Dict:
+        metadata = {
+            'url': url,
+            'type': 'website',
+            'site_name': domain
+        }
+        
+        # 제목: og:title → <title> → 도메인
+        if self.og.get('og:title'):
+            metadata['title'] = self.og['og:title']
+        elif self.title is not None:
+            metadata['title'] = self.title.strip()
+        else:
+            metadata['title'] = domain
+        
+        # 설명: og:description → meta description → 첫 번째 p 태그
+        if self.og.get('og:description'):
+            metadata['description'] = self.og['og:description']
+        elif self.meta_description:
+            metadata['description'] = self.meta_description
+        elif self.first_p is not None:
+            metadata['description'] = self.first_p.strip()[:200] + '...'
+        else:
+            metadata['description'] = ''
+        
+        # 이미지: og:image → 첫 번째 이미지
+        if self.og.get('og:image'):
+            metadata['image_url'] = self.og['og:image']
+        elif self.first_img:
+            img_src = self.first_img
+            if not img_src.startswith('http'):
+                img_src = urljoin(url, img_src)
+            metadata['image_url'] = img_src
+        
+        # 사이트명
+        if self.og.get('og:site_name'):
+            metadata['site_name'] = self.og['og:site_name']
+        
+        return metadata
 
 class URLPreviewGenerator:
     """URL 미리보기 생성 클래스 (YouTube 특별 지원)"""
     
-    def __init__(self, cache_duration: int = 3600):
-        self.cache = {}
+    def __init__(self, cache_duration: int = 3600, max_workers: int = 8, per_host_limit: int = 2,
+                 negative_cache_duration: int = 600, cache_size: int = 2000, max_html_bytes: Optional[int] = None):
+        # 모든 워커가 공유하는 크기 제한 캐시 (실패한 URL은 None으로 짧게 기억)
+        self.cache = SharedTTLCache('url_preview', max_entries=cache_size)
         self.cache_duration = cache_duration
+        self.negative_cache_duration = negative_cache_duration
+        # 미리보기용으로 읽을 HTML 최대 크기 (이 이후의 본문은 받지 않음)
+        self.max_html_bytes = max_html_bytes or int(os.environ.get('URL_PREVIEW_MAX_BYTES', 512 * 1024))
+        self.per_host_limit = per_host_limit
+        # 여러 URL을 동시에 가져오기 위한 공유 스레드 풀과 호스트별 동시 요청 제한
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='url-preview')
+        self._host_semaphores = {}
+        self._host_lock = threading.Lock()
     
     def extract_urls(self, text: str) -> List[str]:
         """텍스트에서 URL 추출"""
@@ -46,7 +175,14 @@ class URLPreviewGenerator:
                 return match.group(1)
         return None
     
-    def get_youtube_data(self, video_id: str) -> Optional[Dict]:
+    @staticmethod
+    def _timeout(default: float, deadline_at: Optional[float]) -> float:
+        """기본 타임아웃과 전체 마감 시각 중 더 이른 쪽에 맞춘 타임아웃 계산"""
+        if deadline_at is None:
+            return default
+        return max(0.1, min(default, deadline_at - time.monotonic()))
+    
+    def get_youtube_data(self, video_id: str, deadline_at: Optional[float] = None) -> Optional[Dict]:
         """YouTube 데이터 추출 (oEmbed API 사용)"""
         try:
             headers = {
@@ -54,29 +190,21 @@ class URLPreviewGenerator:
             }
             # YouTube oEmbed API 사용
             oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-            response = requests.get(oembed_url, headers=headers, timeout=10)
+            response = http_client.get(oembed_url, headers=headers, timeout=self._timeout(10, deadline_at))
             
             if response.status_code == 200:
                 data = response.json()
                 
-                # 고해상도 썸네일 URL 생성
-                thumbnail_urls = [
-                    f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",  # 최고 해상도
-                    f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg",     # 고해상도
-                    f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg",     # 중간 해상도
-                    f"https://img.youtube.com/vi/{video_id}/0.jpg"              # 기본
-                ]
-                
-                # 사용 가능한 썸네일 찾기
+                # 최고 해상도 썸네일만 확인하고, 없으면 모든 동영상에 존재하는 hqdefault 사용
+                # (mqdefault/0.jpg는 hqdefault가 있으면 확인할 필요가 없으므로 요청 1회로 충분)
                 thumbnail_url = None
-                for url in thumbnail_urls:
-                    try:
-                        thumb_response = requests.head(url, headers=headers, timeout=5)
-                        if thumb_response.status_code == 200:
-                            thumbnail_url = url
-                            break
-                    except:
-                        continue
+                maxres_url = f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
+                try:
+                    thumb_response = http_client.head(maxres_url, headers=headers, timeout=self._timeout(5, deadline_at))
+                    if thumb_response.status_code == 200:
+                        thumbnail_url = maxres_url
+                except:
+                    pass
                 
                 return {
                     'type': 'youtube',
@@ -97,21 +225,69 @@ class URLPreviewGenerator:
         
         return None
     
-    def get_url_preview(self, url: str) -> Optional[Dict]:
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._host_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_semaphores[host]
+    
+    def _fetch_with_host_limit(self, url: str, deadline_at: float) -> Optional[Dict]:
+        """호스트별 동시 요청 수를 제한하며 미리보기 생성 (마감 전까지 자리가 나지 않으면 포기)"""
+        semaphore = self._host_semaphore(url)
+        if not semaphore.acquire(timeout=max(0, deadline_at - time.monotonic())):
+            return None
+        try:
+            if time.monotonic() >= deadline_at:
+                return None
+            return self.get_url_preview(url, deadline_at=deadline_at)
+        finally:
+            semaphore.release()
+    
+    def get_url_preview_map(self, urls: List[str], deadline: float = 8.0) -> Dict[str, Optional[Dict]]:
+        """
+        여러 URL의 미리보기를 병렬로 생성하여 {url: 미리보기 또는 None} 형태로 반환.
+        전체 소요 시간은 deadline(초)을 넘지 않으며, 마감까지 끝나지 않은 URL은 None이 됩니다.
+        (늦게 끝난 요청의 결과도 캐시에는 저장되므로 다음 요청에서 재사용됩니다)
+        """
+        if not urls:
+            return {}
+        deadline_at = time.monotonic() + deadline
+        futures = {url: self._executor.submit(self._fetch_with_host_limit, url, deadline_at) for url in urls}
+        wait(futures.values(), timeout=deadline)
+        
+        results = {}
+        for url, future in futures.items():
+            if future.done() and not future.cancelled() and future.exception() is None:
+                results[url] = future.result()
+            else:
+                future.cancel()
+                results[url] = None
+        return results
+    
+    def get_url_previews(self, urls: List[str], deadline: float = 8.0) -> List[Dict]:
+        """여러 URL의 미리보기를 병렬로 생성 (마감 내에 성공한 것만 입력 순서대로 반환)"""
+        preview_map = self.get_url_preview_map(urls, deadline=deadline)
+        return [preview_map[url] for url in urls if preview_map.get(url)]
+    
+    def is_known_failure(self, url: str) -> bool:
+        """최근에 미리보기를 만들 수 없다고 확인된 URL인지 (마감/대기 초과로 결과가 없는 경우는 해당하지 않음)"""
+        return self.cache.get(url) is None
+    
+    def get_url_preview(self, url: str, deadline_at: Optional[float] = None) -> Optional[Dict]:
         """URL 메타데이터 추출 (YouTube 특별 처리)"""
-        # 캐시 확인
+        # 캐시 확인 (None이 저장되어 있으면 최근에 실패한 URL)
         cache_key = url
-        if cache_key in self.cache:
-            cache_time, cache_data = self.cache[cache_key]
-            if time.time() - cache_time < self.cache_duration:
-                return cache_data
+        cached = self.cache.get(cache_key)
+        if cached is not MISSING:
+            return cached
         
         # YouTube 특별 처리
         youtube_id = self.extract_youtube_id(url)
         if youtube_id:
-            youtube_data = self.get_youtube_data(youtube_id)
+            youtube_data = self.get_youtube_data(youtube_id, deadline_at=deadline_at)
             if youtube_data:
-                self.cache[cache_key] = (time.time(), youtube_data)
+                self.cache.set(cache_key, youtube_data, self.cache_duration)
                 return youtube_data
         
         # 일반 웹사이트 처리
@@ -119,81 +295,77 @@ class URLPreviewGenerator:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            preview_data = self._extract_metadata(soup, url)
+            # 본문 전체를 받지 않고 필요한 메타 태그가 나올 때까지만 스트리밍으로 읽음
+            with http_client.get(url, headers=headers, timeout=self._timeout(10, deadline_at), stream=True) as response:
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '')
+                mime_type = content_type.split(';')[0].strip().lower()
+                if mime_type and mime_type not in HTML_CONTENT_TYPES:
+                    raise ValueError(f"HTML이 아닌 콘텐츠입니다: {mime_type}")
+                
+                charset = HEADER_CHARSET_PATTERN.search(content_type)
+                preview_data = self.extract_metadata_stream(
+                    response.iter_content(chunk_size=16 * 1024),
+                    url,
+                    encoding=charset.group(1) if charset else None,
+                    deadline_at=deadline_at
+                )
             
             if preview_data:
-                self.cache[cache_key] = (time.time(), preview_data)
+                self.cache.set(cache_key, preview_data, self.cache_duration)
                 return preview_data
                 
+        except requests.Timeout as e:
+            # 마감 시간에 맞춰 잘린 요청일 수 있으므로 실패로 기억하지 않음
+            print(f"URL 미리보기 생성 오류 ({url}): {e}")
+            return None
         except Exception as e:
             print(f"URL 미리보기 생성 오류 ({url}): {e}")
         
+        self.cache.set(cache_key, None, self.negative_cache_duration)
         return None
     
-    def _extract_metadata(self, soup: BeautifulSoup, url: str) -> Dict:
-        """HTML에서 메타데이터 추출"""
-        metadata = {
-            'url': url,
-            'type': 'website',
-            'site_name': self._get_domain_name(url)
-        }
-        
-        # Open Graph 태그
-        og_tags = {
-            'title': soup.find('meta', property='og:title'),
-            'description': soup.find('meta', property='og:description'),
-            'image': soup.find('meta', property='og:image'),
-            'site_name': soup.find('meta', property='og:site_name')
-        }
-        
-        # 일반 메타 태그
-        meta_tags = {
-            'title': soup.find('title'),
-            'description': soup.find('meta', attrs={'name': 'description'})
-        }
-        
-        # 제목 추출
-        if og_tags['title'] and og_tags['title'].get('content'):
-            metadata['title'] = og_tags['title']['content']
-        elif meta_tags['title']:
-            metadata['title'] = meta_tags['title'].get_text().strip()
-        else:
-            metadata['title'] = self._get_domain_name(url)
-        
-        # 설명 추출
-        if og_tags['description'] and og_tags['description'].get('content'):
-            metadata['description'] = og_tags['description']['content']
-        elif meta_tags['description'] and meta_tags['description'].get('content'):
-            metadata['description'] = meta_tags['description']['content']
-        else:
-            # 첫 번째 p 태그에서 설명 추출
-            first_p = soup.find('p')
-            if first_p:
-                metadata['description'] = first_p.get_text().strip()[:200] + '...'
-            else:
-                metadata['description'] = ''
+    def extract_metadata_stream(self, chunks: Iterable[bytes], url: str, encoding: Optional[str] = None,
+                                max_bytes: Optional[int] = None, deadline_at: Optional[float] = None) -> Dict:
+        """
+        HTML 바이트 조각을 받는 대로 파싱하여 메타데이터 추출.
+        </head>까지 필요한 태그를 모두 찾으면(없으면 본문의 첫 <p>/<img>까지) 즉시 멈추고,
+        max_bytes를 넘거나 마감 시각이 지나도 그때까지 읽은 내용만으로 결과를 만듭니다.
+        """
+        max_bytes = max_bytes or self.max_html_bytes
+        parser = HeadMetadataParser()
+        decoder = None
+        received = 0
         
-        # 이미지 추출
-        if og_tags['image'] and og_tags['image'].get('content'):
-            metadata['image_url'] = og_tags['image']['content']
-        else:
-            # 첫 번째 이미지 찾기
-            first_img = soup.find('img')
-            if first_img and first_img.get('src'):
-                img_src = first_img['src']
-                if not img_src.startswith('http'):
-                    img_src = urljoin(url, img_src)
-                metadata['image_url'] = img_src
-        
-        # 사이트명
-        if og_tags['site_name'] and og_tags['site_name'].get('content'):
-            metadata['site_name'] = og_tags['site_name']['content']
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if decoder is None:
+                decoder = self._incremental_decoder(encoding or self._sniff_charset(chunk))
+            received += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done or received >= max_bytes:
+                break
+            if deadline_at is not None and time.monotonic() >= deadline_at:
+                break
         
-        return metadata
+        if decoder is not None:
+            parser.feed(decoder.decode(b'', final=True))
+        parser.close()
+        return parser.to_metadata(url, self._get_domain_name(url))
+    
+    @staticmethod
+    def _sniff_charset(head_bytes: bytes) -> Optional[str]:
+        """응답 헤더에 charset이 없을 때 문서 앞부분의 <meta charset>에서 인코딩 추정"""
+        match = META_CHARSET_PATTERN.search(head_bytes[:4096])
+        return match.group(1).decode('ascii', 'ignore') if match else None
+    
+    @staticmethod
+    def _incremental_decoder(encoding: Optional[str]):
+        try:
+            return codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        except LookupError:
+            return codecs.getincrementaldecoder('utf-8')(errors='replace')
     
     def _get_domain_name(self, url: str) -> str:
         """URL에서 도메인명 추출"""
@@ -206,11 +378,9 @@ class URLPreviewGenerator:
     def process_text_with_urls(self, text: str) -> tuple[str, List[Dict]]:
         """텍스트에서 URL을 추출하고 미리보기 생성"""
         urls = self.extract_urls(text)
-        url_previews = []
+        url_previews = self.get_url_previews(urls)
         
-        for url in urls:
-            preview = self.get_url_preview(url)
-            if preview:
-                url_previews.append(preview)
-        
-        return text, url_previews
\ No newline at end of file
+        return text, url_previews
+
+# 싱글톤 인스턴스 생성
+url_preview_generator = URLPreviewGenerator()
@@ -1,4 +1,4 @@
-import requests
+from utils.http_client import http_client
 from datetime import datetime
 import pytz
 
@@ -18,7 +18,7 @@ def fetch_and_post_weather(app, db, Post, SystemSetting, User):
         
         try:
             # 타임아웃 10초, 한국어 결과 플래그
-            r = requests.get('https://wttr.in/Seoul?format=j1&lang=ko', timeout=10)
+            r = http_client.get('https://wttr.in/Seoul?format=j1&lang=ko', timeout=10)
             r.encoding = 'utf-8'  # 응답 인코딩을 명시적으로 UTF-8로 지정 (한글 깨짐 방지)
             data = r.json()
             